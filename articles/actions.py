@@ -0,0 +1,108 @@
+"""
+Admin actions applying the set based changes of ``articles.bulk`` to the
+selected articles. The category and tags extensions add their actions to
+``ArticleAdmin``.
+"""
+from django import forms
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.admin import helpers
+from django.core.exceptions import ValidationError
+from django.template.response import TemplateResponse
+from django.utils.translation import ugettext_lazy as _, ungettext
+
+from articles import bulk
+
+
+def activate_articles(modeladmin, request, queryset):
+    count = bulk.set_active(queryset, True)
+    modeladmin.message_user(request, ungettext(
+        '%d article has been activated.', '%d articles have been activated.', count) % count)
+activate_articles.short_description = _('Activate selected articles')
+
+
+def deactivate_articles(modeladmin, request, queryset):
+    count = bulk.set_active(queryset, False)
+    modeladmin.message_user(request, ungettext(
+        '%d article has been deactivated.', '%d articles have been deactivated.', count) % count)
+deactivate_articles.short_description = _('Deactivate selected articles')
+
+
+def bulk_form_action(modeladmin, request, queryset, form_class, title, apply):
+    """
+    Ask for the parameters of an action on an intermediate page, then call
+    ``apply(cleaned_data)`` and show the message it returns.
+    """
+    form = form_class(request.POST if 'apply' in request.POST else None)
+    if form.is_valid():
+        try:
+            modeladmin.message_user(request, apply(form.cleaned_data))
+        except ValidationError as e:
+            modeladmin.message_user(request, ' '.join(e.messages), messages.ERROR)
+        # Back to the changelist
+        return None
+
+    return TemplateResponse(request, 'admin/articles/bulk_action.html', {
+        'title': title,
+        'form': form,
+        'opts': modeladmin.model._meta,
+        'count': queryset.count(),
+        'action': request.POST['action'],
+        'select_across': request.POST.get('select_across', '0'),
+        'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+        'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+    }, current_app=modeladmin.admin_site.name)
+
+
+class CategoryForm(forms.Form):
+    def __init__(self, *args, **kwargs):
+        super(CategoryForm, self).__init__(*args, **kwargs)
+        from articles.modules.category.models import Category
+        if getattr(settings, 'ARTICLE_ADMIN_HIGH_VOLUME', False):
+            self.fields['category'] = forms.ModelChoiceField(
+                Category.objects.all(), label=_('category'), to_field_name='slug',
+                widget=forms.TextInput, help_text=_('The slug of the category.'))
+        else:
+            self.fields['category'] = forms.ModelChoiceField(Category.objects.all(), label=_('category'))
+
+
+def move_to_category(modeladmin, request, queryset):
+    def apply(data):
+        count = bulk.move_to_category(queryset, data['category'])
+        return ungettext('%(count)d article has been moved to %(category)s.',
+                         '%(count)d articles have been moved to %(category)s.', count) % {
+            'count': count, 'category': data['category']}
+
+    return bulk_form_action(modeladmin, request, queryset, CategoryForm,
+                            _('Move articles to category'), apply)
+move_to_category.short_description = _('Move selected articles to category')
+
+
+class TagsForm(forms.Form):
+    add = forms.CharField(label=_('add tags'), required=False,
+                          help_text=_('A comma-separated list of tags.'))
+    remove = forms.CharField(label=_('remove tags'), required=False,
+                             help_text=_('A comma-separated list of tags.'))
+
+    def clean(self):
+        from taggit.utils import parse_tags
+        data = super(TagsForm, self).clean()
+        data['add'], data['remove'] = parse_tags(data.get('add', '')), parse_tags(data.get('remove', ''))
+        if not data['add'] and not data['remove']:
+            raise forms.ValidationError(_('Enter the tags to add or remove.'))
+        return data
+
+
+def edit_tags(modeladmin, request, queryset):
+    def apply(data):
+        count = queryset.count()
+        if data['add']:
+            bulk.add_tags(queryset, data['add'])
+        if data['remove']:
+            bulk.remove_tags(queryset, data['remove'])
+        return ungettext('The tags of %d article have been changed.',
+                         'The tags of %d articles have been changed.', count) % count
+
+    return bulk_form_action(modeladmin, request, queryset, TagsForm,
+                            _('Edit tags of articles'), apply)
+edit_tags.short_description = _('Add or remove tags of selected articles')
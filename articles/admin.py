@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .bases import ArticleAdmin
+from .modeladmin import ArticleAdmin
 from .models import Article
 
 
@@ -1,24 +1,86 @@
-from django.conf import settings
-from django.core.urlresolvers import get_callable
+from collections import namedtuple
+
 from django.db import models
 from django.db.models import Q
 from django.utils.translation import ugettext_lazy as _
 from django.conf.urls import patterns, url
 from django.utils.encoding import python_2_unicode_compatible
 
-try:
-    from feincms.admin.item_editor import ItemEditor
-except ImportError:
-    from feincm.admin.editor import ItemEditor
-from feincms.content.application import models as app_models
 from feincms.models import Base
 from feincms.module.mixins import ContentModelMixin
 from feincms.utils.managers import ActiveAwareContentManagerMixin
 
+from . import routing
+from .cache import CachedManagerMixin
+from .utils import app_permalink, content_text, deprecated_imports
+
 
-class ArticleManager(ActiveAwareContentManagerMixin, models.Manager):
+class ArticleManager(CachedManagerMixin, ActiveAwareContentManagerMixin, models.Manager):
     active_filters = {'simple-active': Q(active=True)}
 
+    def active(self, *args, **kwargs):
+        queryset = super(ArticleManager, self).active(*args, **kwargs)
+        return routing.route_read(queryset)
+
+    def records(self, queryset=None, fields=('pk', 'title', 'slug'), regions=None, chunk_size=1000):
+        """
+        Iterate over read-only, slotted records instead of model instances.
+
+        Rows are fetched ``chunk_size`` at a time by primary key, so memory use
+        stays constant however large ``queryset`` (default: all articles) is.
+        If ``regions`` is given, records get a ``text`` attribute holding the
+        plain text of the content in those regions.
+        """
+        if queryset is None:
+            queryset = self.all()
+        fields = tuple(fields)
+        if 'pk' not in fields:
+            fields = ('pk',) + fields
+
+        record_class = namedtuple('ArticleRecord', fields + (('text',) if regions is not None else ()))
+        pk_index = fields.index('pk')
+        queryset = queryset.order_by('pk').values_list(*fields)
+
+        last_pk = None
+        while True:
+            chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            rows = list(chunk[:chunk_size])
+            if not rows:
+                return
+            last_pk = rows[-1][pk_index]
+
+            if regions is None:
+                for row in rows:
+                    yield record_class(*row)
+            else:
+                texts = self.region_text([row[pk_index] for row in rows], regions)
+                for row in rows:
+                    yield record_class(*(row + (texts.get(row[pk_index], u''),)))
+
+    def search_texts(self, queryset=None, chunk_size=1000):
+        """
+        Yield ``(pk, text)`` with the title and the plain text of the content
+        of each article (of ``queryset``), the text search indexes.
+        """
+        for record in self.records(queryset, fields=('pk', 'title'), regions=(), chunk_size=chunk_size):
+            yield record.pk, u'%s\n%s' % (record.title, record.text)
+
+    def region_text(self, pks, regions=()):
+        """
+        Return a dict of article pk to the plain text of its content in
+        ``regions`` (default: all regions), with one query per content type.
+        """
+        regions = list(regions) or [region.key for region in self.model._feincms_all_regions]
+        contents = dict((pk, dict((region, []) for region in regions)) for pk in pks)
+
+        for content_type in self.model._feincms_content_types:
+            queryset = content_type.objects.filter(parent__in=pks, region__in=regions).order_by('ordering')
+            for content in queryset.iterator():
+                contents[content.parent_id][content.region].append((content.ordering, content_text(content)))
+
+        return dict((pk, u'\n'.join(text for region in regions for ordering, text in sorted(by_region[region])))
+                    for pk, by_region in contents.items())
+
 
 @python_2_unicode_compatible
 class BaseArticle(ContentModelMixin, Base):
@@ -44,7 +106,7 @@ class BaseArticle(ContentModelMixin, Base):
 
     @classmethod
     def get_urlpatterns(cls):
-        import views
+        from articles import views
         return patterns('',
             url(r'^$', views.ArticleList.as_view(), name='article_index'),
             url(r'^(?P<slug>[a-z0-9_-]+)/$', views.ArticleDetail.as_view(), name='article_detail'),
@@ -67,7 +129,7 @@ class BaseArticle(ContentModelMixin, Base):
     def __str__(self):
         return self.title
 
-    @app_models.permalink
+    @app_permalink
     def get_absolute_url(self):
         return ('article_detail', 'articles.urls', (), {'slug': self.slug})
 
@@ -76,23 +138,4 @@ class BaseArticle(ContentModelMixin, Base):
         return self.__class__.objects.active().filter(pk=self.pk).count() > 0
 
 
-ExtensionModelAdmin = get_callable(getattr(
-    settings, 'ARTICLE_MODELADMIN_CLASS', 'feincms.extensions.ExtensionModelAdmin'))
-
-
-class ArticleAdmin(ItemEditor, ExtensionModelAdmin):
-    list_display = ['title', 'active']
-    list_filter = []
-    search_fields = ['title', 'slug']
-    filter_horizontal = []
-    prepopulated_fields = {
-        'slug': ('title',),
-    }
-    fieldsets = [
-        (None, {
-            'fields': ['active', 'title', 'slug']
-        }),
-        # <-- insertion point, extensions appear here, see insertion_index above
-    ]
-
-    fieldset_insertion_index = 1
+deprecated_imports(__name__, {'ArticleAdmin': 'articles.modeladmin.ArticleAdmin'})
@@ -0,0 +1,113 @@
+"""
+Set based changes to many articles at once.
+
+Each function takes a queryset of articles, applies its change with chunked
+``UPDATE`` statements (one transaction per chunk) instead of saving every
+article, and sends ``articles.signals.articles_bulk_updated`` once at the end
+so that caches, category counts, related articles and search indexes are
+refreshed per batch. ``pre_save``/``post_save`` are not sent.
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db import router, transaction
+
+from articles import signals
+from articles.utils import chunked
+
+
+def field_names(model):
+    return [f.name for f in model._meta.fields]
+
+
+def primary_keys(queryset, chunk_size=500):
+    """The pks of ``queryset``, fetched ``chunk_size`` at a time."""
+    records = queryset.model._default_manager.records(queryset, fields=('pk',), chunk_size=chunk_size)
+    return [record.pk for record in records]
+
+
+def update_in_chunks(queryset, chunk_size=500, **values):
+    """``queryset.update(**values)`` in chunks, returning the updated pks."""
+    model = queryset.model
+    using = router.db_for_write(model)
+    manager = model._default_manager.db_manager(using)
+
+    pks = primary_keys(queryset, chunk_size)
+    for chunk in chunked(pks, chunk_size):
+        with transaction.atomic(using=using):
+            manager.filter(pk__in=chunk).update(**values)
+    return pks
+
+
+def refresh_publication_state(model, pks, chunk_size=500):
+    """Recompute ``is_live`` of the given articles, if it is maintained."""
+    if 'is_live' not in field_names(model):
+        return
+    from articles.extensions.publication_state import update_publication_state
+    for chunk in chunked(pks, chunk_size):
+        update_publication_state(model, queryset=model._default_manager.filter(pk__in=chunk), notify=False)
+
+
+def set_active(queryset, active, chunk_size=500):
+    """Activate or deactivate all articles of ``queryset``, return their count."""
+    model = queryset.model
+    pks = update_in_chunks(queryset.exclude(active=active), chunk_size, active=active)
+    refresh_publication_state(model, pks, chunk_size)
+    signals.articles_bulk_updated.send(sender=model, pks=pks, fields=['active'])
+    return len(pks)
+
+
+def move_to_category(queryset, category, chunk_size=500):
+    """
+    Move all articles of ``queryset`` into ``category``, return their count.
+    Slugs are unique across categories, so moving can't make them collide.
+    """
+    model = queryset.model
+    pks = update_in_chunks(queryset.exclude(category=category), chunk_size, category=category)
+    signals.articles_bulk_updated.send(sender=model, pks=pks, fields=['category'])
+    return len(pks)
+
+
+def get_tags(names):
+    from taggit.models import Tag
+    tags = []
+    for name in names:
+        tag, created = Tag.objects.get_or_create(name=name)
+        tags.append(tag)
+    return tags
+
+
+def add_tags(queryset, names, chunk_size=500):
+    """Add the tags called ``names`` to all articles of ``queryset``."""
+    from taggit.models import TaggedItem
+
+    model = queryset.model
+    content_type = ContentType.objects.get_for_model(model)
+    tags = get_tags(names)
+    pks = primary_keys(queryset, chunk_size)
+
+    for chunk in chunked(pks, chunk_size):
+        with transaction.atomic():
+            existing = set(TaggedItem.objects.filter(
+                content_type=content_type, object_id__in=chunk, tag__in=tags).values_list('object_id', 'tag_id'))
+            TaggedItem.objects.bulk_create([
+                TaggedItem(content_type=content_type, object_id=pk, tag=tag)
+                for pk in chunk for tag in tags if (pk, tag.pk) not in existing])
+
+    signals.articles_bulk_updated.send(sender=model, pks=pks, fields=['tags'])
+    return len(pks)
+
+
+def remove_tags(queryset, names, chunk_size=500):
+    """Remove the tags called ``names`` from all articles of ``queryset``."""
+    from taggit.models import TaggedItem
+
+    model = queryset.model
+    content_type = ContentType.objects.get_for_model(model)
+    pks = primary_keys(queryset, chunk_size)
+
+    for chunk in chunked(pks, chunk_size):
+        with transaction.atomic():
+            TaggedItem.objects.filter(
+                content_type=content_type, object_id__in=chunk, tag__name__in=names).delete()
+
+    signals.articles_bulk_updated.send(sender=model, pks=pks, fields=['tags'])
+    return len(pks)
@@ -0,0 +1,247 @@
+"""
+Result caching for article and category querysets.
+
+``Article.objects.active().cached()`` stores the primary keys a query returned
+under a key derived from its SQL and the generation counters of the models it
+reads. Saving or deleting an article or category, changing the access groups
+of a category and the bulk changes of ``articles.bulk`` bump the generation of
+the changed model, so cached results are never stale; the timeout only bounds
+memory use. Every bump also advances a global generation used by the caches
+of whole pages and rendered content, which depend on any model.
+
+Queries whose parameters change on every call (e.g. the current time added by
+the datepublisher extension) never hit the cache; register
+``articles.extensions.publication_state`` to make ``active()`` cacheable.
+
+Content types rendering article lists cache their output with
+``cached_render`` when ``ARTICLE_CONTENT_CACHE_TIMEOUT`` is set. Both paths
+use ``get_or_compute`` so that concurrent misses of a key compute it once.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import get_models
+try:
+    from django.db.models.sql.datastructures import EmptyResultSet
+except ImportError:  # Django >= 1.11
+    from django.core.exceptions import EmptyResultSet
+
+
+GENERATION_KEY = 'articles:generation:%s'
+QUERYSET_KEY = 'articles:queryset:%s'
+CONTENT_KEY = 'articles:content:%s'
+ACCESS_GROUPS_KEY = 'articles:access-groups:%s'
+
+# Label of the generation bumped by any change
+ALL_MODELS = '*'
+
+
+def model_label(model):
+    return '%s.%s' % (model._meta.app_label, model._meta.object_name.lower())
+
+
+def get_generation(*models):
+    """
+    The generation of ``models``, or of all models if none are given. Changes
+    whenever one of them is saved, deleted or changed in bulk.
+    """
+    keys = [GENERATION_KEY % label for label in [model_label(model) for model in models] or [ALL_MODELS]]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if generations.get(key) is None:
+            # Start from the clock so an evicted counter never reuses old values
+            cache.add(key, int(time.time() * 1000), None)
+            generations[key] = cache.get(key)
+    return '.'.join(str(generations[key]) for key in keys)
+
+
+def bump_generation(sender=None, **kwargs):
+    """Signal receiver invalidating the cached data depending on ``sender`` (a model)."""
+    labels = [ALL_MODELS] if sender is None else [model_label(sender), ALL_MODELS]
+    for label in labels:
+        try:
+            cache.incr(GENERATION_KEY % label)
+        except ValueError:
+            cache.set(GENERATION_KEY % label, int(time.time() * 1000), None)
+
+
+def bump_generation_for_m2m(sender, action, **kwargs):
+    """``m2m_changed`` receiver, connected per through model."""
+    if action.startswith('post_'):
+        bump_generation(sender)
+
+
+def get_or_compute(key, compute, timeout, cacheable=None):
+    """
+    Return the cached value of ``key``, calling ``compute`` on a miss.
+    Values for which ``cacheable(value)`` is false are returned uncached.
+
+    Concurrent misses for the same key compute the value once: callers wait
+    (up to ``ARTICLE_CACHE_LOCK_TIMEOUT`` seconds) for the one holding the
+    lock in the cache to store the value. No lock is held by the process while
+    computing, so nested computations can't deadlock.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock_key = '%s:lock' % key
+    lock_timeout = getattr(settings, 'ARTICLE_CACHE_LOCK_TIMEOUT', 10)
+    locked = cache.add(lock_key, 1, lock_timeout)
+    if not locked:
+        deadline = time.time() + lock_timeout
+        while time.time() < deadline:
+            time.sleep(0.05)
+            value = cache.get(key)
+            if value is not None:
+                return value
+            if cache.get(lock_key) is None:
+                # Released without storing a (cacheable) value
+                break
+
+    try:
+        value = compute()
+        if cacheable is None or cacheable(value):
+            cache.set(key, value, timeout)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return value
+
+
+def get_access_group_ids():
+    """Ids of the groups restricting access to at least one category."""
+    from django.db.models import get_model
+    Category = get_model('articles', 'Category')
+    if Category is None:
+        return frozenset()
+
+    def compute():
+        return frozenset(Category.access_groups.through.objects.values_list('group_id', flat=True).distinct())
+    return get_or_compute(ACCESS_GROUPS_KEY % get_generation(Category.access_groups.through), compute,
+                          getattr(settings, 'ARTICLE_QUERYSET_CACHE_TIMEOUT', 300))
+
+
+def get_cache_variant(user):
+    """
+    Identify what ``user`` may see. Anonymous users share one variant, logged
+    in users one per combination of access groups they belong to; other
+    groups don't matter.
+    """
+    if user is None or not user.is_authenticated():
+        return 'anonymous'
+    if not hasattr(user, '_articles_cache_variant'):
+        group_ids = sorted(set(user.groups.values_list('pk', flat=True)) & get_access_group_ids())
+        user._articles_cache_variant = hashlib.md5(
+            ','.join(str(pk) for pk in group_ids).encode('utf-8')).hexdigest()
+    return user._articles_cache_variant
+
+
+def cached_render(render):
+    """
+    Cache a content type's ``render`` for ``ARTICLE_CONTENT_CACHE_TIMEOUT``
+    seconds per content (including its many to many values), generation and
+    access variant.
+    """
+    @wraps(render)
+    def inner(self, **kwargs):
+        timeout = getattr(settings, 'ARTICLE_CONTENT_CACHE_TIMEOUT', None)
+        if not timeout:
+            return render(self, **kwargs)
+
+        request = kwargs.get('request')
+        fields = [(f.attname, getattr(self, f.attname)) for f in self._meta.fields]
+        # Changing e.g. the categories of an ArticleList saves no field
+        fields += [(f.name, sorted(getattr(self, f.name).values_list('pk', flat=True)))
+                   for f in self._meta.many_to_many]
+        key = u'%s|%s|%s|%s' % (self._meta.db_table, fields, get_generation(),
+                                get_cache_variant(getattr(request, 'user', None)))
+        key = CONTENT_KEY % hashlib.md5(key.encode('utf-8')).hexdigest()
+        return get_or_compute(key, lambda: render(self, **kwargs), timeout)
+    return inner
+
+
+def query_models(sql, using):
+    """The models whose tables ``sql`` reads, including through subqueries."""
+    quote_name = connections[using].ops.quote_name
+    return [model for model in get_models(include_auto_created=True)
+            if quote_name(model._meta.db_table) in sql]
+
+
+class CachedQuerySetMixin(object):
+    cache_timeout = None
+
+    def cached(self, timeout=None):
+        """Serve this queryset's results from the cache, see ``articles.cache``."""
+        clone = self._clone()
+        clone.cache_timeout = timeout or getattr(settings, 'ARTICLE_QUERYSET_CACHE_TIMEOUT', 300)
+        return clone
+
+    def _clone(self, *args, **kwargs):
+        clone = super(CachedQuerySetMixin, self)._clone(*args, **kwargs)
+        if isinstance(clone, CachedQuerySetMixin):
+            clone.cache_timeout = self.cache_timeout
+        return clone
+
+    def cache_key(self):
+        sql, params = self.query.sql_with_params()
+        query = u'%s|%s|%s|%s' % (self.db, get_generation(*query_models(sql, self.db)), sql, params)
+        return QUERYSET_KEY % hashlib.md5(query.encode('utf-8')).hexdigest()
+
+    def get_cache_timeout(self):
+        timeout = self.cache_timeout
+        if 'is_live' in [f.name for f in self.model._meta.fields]:
+            from articles.extensions.publication_state import cache_timeout
+            timeout = min(timeout, cache_timeout(self.model, timeout))
+        return timeout
+
+    def iterator(self):
+        if not self.cache_timeout:
+            return super(CachedQuerySetMixin, self).iterator()
+
+        try:
+            key = self.cache_key()
+        except EmptyResultSet:
+            return iter([])
+
+        fetched = []
+
+        def compute():
+            fetched.extend(super(CachedQuerySetMixin, self).iterator())
+            return [obj.pk for obj in fetched]
+
+        pks = get_or_compute(key, compute, self.get_cache_timeout())
+        if fetched:
+            return iter(fetched)
+
+        # Fetch the cached rows by primary key, keeping joins and annotations
+        queryset = self._clone()
+        queryset.cache_timeout = None
+        queryset.query.clear_limits()
+        objects = dict((obj.pk, obj) for obj in queryset.filter(pk__in=pks).order_by())
+        return iter([objects[pk] for pk in pks if pk in objects])
+
+
+_queryset_classes = {}
+
+
+def cached_queryset_class(base):
+    """``base`` (e.g. ``QuerySet`` or ``GeoQuerySet``) with ``cached()`` added."""
+    if issubclass(base, CachedQuerySetMixin):
+        return base
+    if base not in _queryset_classes:
+        _queryset_classes[base] = type('Cached%s' % base.__name__, (CachedQuerySetMixin, base), {})
+    return _queryset_classes[base]
+
+
+class CachedManagerMixin(object):
+    def get_queryset(self):
+        queryset = super(CachedManagerMixin, self).get_queryset()
+        return queryset._clone(klass=cached_queryset_class(queryset.__class__))
+
+    def cached(self, timeout=None):
+        return self.get_queryset().cached(timeout)
@@ -0,0 +1,57 @@
+"""
+Admin changelist helpers for large article tables.
+
+Used by ``ArticleAdmin`` when ``ARTICLE_ADMIN_HIGH_VOLUME`` is set.
+"""
+import re
+
+from django.conf import settings
+from django.contrib.admin.views.main import SEARCH_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+
+
+ROWS_RE = re.compile(r'rows=(\d+)')
+
+
+def estimate_count(queryset):
+    """
+    Return the planner's row estimate for ``queryset`` on PostgreSQL, or its
+    exact count when the estimate is small or unavailable.
+    """
+    threshold = getattr(settings, 'ARTICLE_ADMIN_ESTIMATE_THRESHOLD', 10000)
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.query.sql_with_params()
+        cursor = connection.cursor()
+        cursor.execute('EXPLAIN %s' % sql, params)
+        match = ROWS_RE.search(cursor.fetchone()[0])
+        if match and int(match.group(1)) > threshold:
+            return int(match.group(1))
+
+    return queryset.count()
+
+
+class EstimatedCountPaginator(Paginator):
+    def _get_count(self):
+        if self._count is None:
+            self._count = estimate_count(self.object_list)
+        return self._count
+    count = property(_get_count)
+
+
+class EstimatedCountChangeList(ChangeList):
+    """ChangeList that doesn't count the unfiltered table exactly either."""
+
+    def get_results(self, request):
+        params = self.params
+        try:
+            # Don't let the base class run an exact count of root_queryset
+            self.params = dict((k, v) for k, v in params.items() if k not in self.get_filters_params())
+            self.params.pop(SEARCH_VAR, None)
+            super(EstimatedCountChangeList, self).get_results(request)
+        finally:
+            self.params = params
+
+        if self.get_filters_params() or self.params.get(SEARCH_VAR):
+            self.full_result_count = estimate_count(self.root_queryset)
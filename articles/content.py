@@ -1,21 +1,28 @@
 from django.db import models
 from django.template.loader import render_to_string
 
+from .cache import cached_render
 from .models import Article
+from .querybudget import query_budget
 
 
 class ArticleList(models.Model):
     number = models.IntegerField()
 
+    #: Maximum number of queries a render may run, see ``articles.querybudget``
+    query_budget = None
+
     class Meta:
         abstract = True
 
     def get_queryset_for_render(self):
         return Article.objects.all()
 
+    @cached_render
     def render(self, **kwargs):
         context = {
             'object_list': self.get_queryset_for_render()[:self.number],
             'request': kwargs.get('request'),
         }
-        return render_to_string('content/articles/list.html', context)
+        with query_budget(self.query_budget, self.__class__.__name__):
+            return render_to_string('content/articles/list.html', context)
@@ -1,10 +1,153 @@
+"""
+Geolocated articles.
+
+Adds an optional ``location`` point (WGS 84) and a JSON endpoint clustering
+the active articles of a map view. Clusters are computed per tile of an
+equirectangular grid (``360 / 2 ** zoom`` by ``180 / 2 ** zoom`` degrees)
+divided into :data:`ARTICLE_MAP_CLUSTER_CELLS` cells per side, with
+``ST_SnapToGrid`` on PostGIS and in Python elsewhere, and cached per tile.
+"""
+import hashlib
+import math
 import warnings
+from collections import defaultdict
 
-from django.contrib.gis import admin
+from django.conf import settings
+from django.conf.urls import patterns, url
 from django.contrib.gis.db import models
+from django.db import connections
 from django.utils.translation import ugettext_lazy as _
 from feincms import extensions
 
+from articles.cache import get_cache_variant, get_generation, get_or_compute
+from articles.utils import filter_by_category_access
+
+
+TILE_KEY = 'articles:map-tile:%s'
+
+
+def tile_size(zoom):
+    return 360.0 / 2 ** zoom, 180.0 / 2 ** zoom
+
+
+def tile_range(bbox, zoom):
+    """
+    First and last x and y of the tiles at ``zoom`` covering ``bbox``
+    (min lng, min lat, max lng, max lat).
+    """
+    width, height = tile_size(zoom)
+    last = 2 ** zoom - 1
+
+    def index(value, offset, size):
+        return min(max(int(math.floor((value + offset) / size)), 0), last)
+
+    return (index(bbox[0], 180, width), index(bbox[2], 180, width),
+            index(bbox[1], 90, height), index(bbox[3], 90, height))
+
+
+def tile_count(bbox, zoom):
+    x0, x1, y0, y1 = tile_range(bbox, zoom)
+    return max(x1 - x0 + 1, 0) * max(y1 - y0 + 1, 0)
+
+
+def tiles_for_bbox(bbox, zoom):
+    x0, x1, y0, y1 = tile_range(bbox, zoom)
+    return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+
+def tile_bounds(zoom, x, y):
+    width, height = tile_size(zoom)
+    return -180 + x * width, -90 + y * height, width, height
+
+
+def cluster_sql(queryset, zoom, x, y, cells):
+    """Cluster a tile in the database, returns (cell x, cell y, count, lng, lat, article) rows."""
+    from django.contrib.gis.geos import Polygon
+
+    minx, miny, width, height = tile_bounds(zoom, x, y)
+    cell_w, cell_h = width / cells, height / cells
+    tile = Polygon.from_bbox((minx, miny, minx + width, miny + height))
+    points = queryset.filter(location__bboverlaps=tile).order_by().values_list('pk', 'location')
+    inner, params = points.query.sql_with_params()
+    connection = connections[queryset.db]
+
+    # Snapping to a grid offset by half a cell puts every point on the centre
+    # of the cell it lies in
+    sql = """
+        SELECT ROUND((ST_X(cell) - %%s) / %%s), ROUND((ST_Y(cell) - %%s) / %%s), COUNT(*),
+               ST_X(ST_Centroid(ST_Collect(location))), ST_Y(ST_Centroid(ST_Collect(location))), MIN(pk)
+        FROM (SELECT %(pk)s AS pk, location, ST_SnapToGrid(location, %%s, %%s, %%s, %%s) AS cell
+              FROM (%(inner)s) AS points) AS snapped
+        GROUP BY cell""" % {'pk': connection.ops.quote_name(queryset.model._meta.pk.column), 'inner': inner}
+    origin_x, origin_y = minx + cell_w / 2, miny + cell_h / 2
+    cursor = connection.cursor()
+    # Parameters in the order of the placeholders: the outer select, the
+    # snapping grid, then the inner query
+    cursor.execute(sql, (origin_x, cell_w, origin_y, cell_h) + (origin_x, origin_y, cell_w, cell_h) + tuple(params))
+    return cursor.fetchall()
+
+
+def cluster_python(queryset, zoom, x, y, cells):
+    """Same as ``cluster_sql`` for databases without PostGIS."""
+    from django.contrib.gis.geos import Polygon
+
+    minx, miny, width, height = tile_bounds(zoom, x, y)
+    cell_w, cell_h = width / cells, height / cells
+
+    grid = defaultdict(list)
+    # ``intersects`` is available on every spatial backend and keeps the
+    # points on the edges of the tile
+    tile = Polygon.from_bbox((minx, miny, minx + width, miny + height))
+    points = queryset.filter(location__intersects=tile).order_by().values_list('pk', 'location')
+    for pk, point in points.iterator():
+        cell = (int(math.floor((point.x - minx) / cell_w)), int(math.floor((point.y - miny) / cell_h)))
+        grid[cell].append((pk, point.x, point.y))
+
+    return [(cx, cy, len(points),
+             sum(p[1] for p in points) / len(points), sum(p[2] for p in points) / len(points),
+             min(p[0] for p in points))
+            for (cx, cy), points in grid.items()]
+
+
+def cluster_tile(queryset, zoom, x, y):
+    cells = getattr(settings, 'ARTICLE_MAP_CLUSTER_CELLS', 8)
+    if getattr(connections[queryset.db].ops, 'postgis', False):
+        rows = cluster_sql(queryset, zoom, x, y, cells)
+    else:
+        rows = cluster_python(queryset, zoom, x, y, cells)
+
+    # Points on the far edges belong to the neighbouring tiles
+    return [{'lng': lng, 'lat': lat, 'count': count, 'article': article}
+            for cx, cy, count, lng, lat, article in rows
+            if 0 <= cx < cells and 0 <= cy < cells]
+
+
+def map_clusters(bbox, zoom, user=None):
+    """
+    Clusters of the active articles (accessible to ``user``) in the tiles
+    covering ``bbox``, each cached until an article or category changes.
+    """
+    from articles.models import Article
+
+    queryset = filter_by_category_access(Article.objects.active(), user)
+    dependencies = [Article]
+    if 'category' in [f.name for f in Article._meta.fields]:
+        from articles.modules.category.models import Category
+        dependencies += [Category, Category.access_groups.through]
+
+    timeout = getattr(settings, 'ARTICLE_QUERYSET_CACHE_TIMEOUT', 300)
+    if 'is_live' in [f.name for f in Article._meta.fields]:
+        from articles.extensions.publication_state import cache_timeout
+        timeout = cache_timeout(Article, timeout)
+
+    clusters = []
+    for x, y in tiles_for_bbox(bbox, zoom):
+        key = '%s|%s|%s|%s|%s|%s' % (Article._meta.db_table, zoom, x, y,
+                                     get_generation(*dependencies), get_cache_variant(user))
+        clusters.extend(get_or_compute(TILE_KEY % hashlib.md5(key.encode('utf-8')).hexdigest(),
+                                       lambda: cluster_tile(queryset, zoom, x, y), timeout))
+    return clusters
+
 
 class Extension(extensions.Extension):
     def handle_model(self):
@@ -12,15 +155,27 @@ class Extension(extensions.Extension):
             'location',
             models.PointField(verbose_name=_('location'), null=True, blank=True))
 
-        from articles.models import ArticleManager
+        from articles.bases import ArticleManager
 
         class GeoArticleManager(ArticleManager, models.GeoManager):
             pass
 
         self.model.add_to_class('objects', GeoArticleManager())
 
+        self.model.get_urlpatterns_location_orig = self.model.get_urlpatterns
+
+        @classmethod
+        def get_urlpatterns(cls):
+            from articles import views
+            return patterns('',
+                url(r'^map/clusters/$', views.ArticleMapClusters.as_view(), name='article_map_clusters'),
+            ) + cls.get_urlpatterns_location_orig()
+        self.model.get_urlpatterns = get_urlpatterns
+
     def handle_modeladmin(self, modeladmin):
-        if not issubclass(modeladmin, admin.OSMGeoAdmin):
+        from django.contrib.gis import admin
+
+        if not isinstance(modeladmin, admin.OSMGeoAdmin):
             warnings.warn(
                 "The admin class articles ArticleAdmin class is not a sub class of django.contrib.gis.admin.OSMGeoAdmin. "
                 "Consider setting ARTICLE_MODELADMIN_CLASS = 'django.contrib.gis.admin.OSMGeoAdmin'")
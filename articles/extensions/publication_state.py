@@ -0,0 +1,120 @@
+"""
+Maintained publication state for the datepublisher extension.
+
+Stores whether an article is currently live in the indexed ``is_live`` column
+so that ``active()`` becomes a single, time independent predicate. Saving an
+article updates its own flag; ``manage.py update_article_publication_state``
+must run regularly (e.g. every minute from cron) to flip articles whose
+publication window opened or closed since.
+"""
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+from django.db.models import Min, Q
+from django.db.models.signals import pre_save
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+from feincms import extensions
+
+from articles import signals
+from articles.cache import bump_generation
+
+
+NEXT_TRANSITION_CACHE_KEY = 'articles:publication-state:next:%s'
+
+
+def live_query(now):
+    return Q(active=True) & Q(publication_date__lte=now) & (
+        Q(publication_end_date__isnull=True) | Q(publication_end_date__gt=now))
+
+
+def is_live(article, now):
+    return bool(article.active and article.publication_date and article.publication_date <= now and (
+        article.publication_end_date is None or article.publication_end_date > now))
+
+
+def update_is_live(sender, instance, raw=False, **kwargs):
+    instance.is_live = is_live(instance, timezone.now())
+    # The saved article may be the next one to go live or offline
+    cache.delete(NEXT_TRANSITION_CACHE_KEY % sender._meta.db_table)
+
+
+def update_publication_state(model, now=None, queryset=None, notify=True):
+    """
+    Flip ``is_live`` for articles (of ``queryset``) whose publication window
+    changed and return the (went live, went offline) primary key lists.
+    Pass ``notify=False`` if the caller invalidates caches itself.
+    """
+    if now is None:
+        now = timezone.now()
+
+    manager = model._default_manager
+    if queryset is None:
+        queryset = manager.all()
+    went_live = list(queryset.filter(is_live=False).filter(live_query(now)).values_list('pk', flat=True))
+    went_offline = list(queryset.filter(is_live=True).exclude(live_query(now)).values_list('pk', flat=True))
+
+    if went_live:
+        manager.filter(pk__in=went_live).update(is_live=True)
+    if went_offline:
+        manager.filter(pk__in=went_offline).update(is_live=False)
+
+    if notify and (went_live or went_offline):
+        bump_generation(model)
+        signals.publication_changed.send(sender=model, went_live=went_live, went_offline=went_offline)
+    cache.delete(NEXT_TRANSITION_CACHE_KEY % model._meta.db_table)
+    return went_live, went_offline
+
+
+def next_transition(model, now=None):
+    """The next time an article goes live or offline, or None."""
+    if now is None:
+        now = timezone.now()
+
+    manager = model._default_manager
+    times = [
+        manager.filter(active=True, is_live=False, publication_date__gt=now).aggregate(
+            t=Min('publication_date'))['t'],
+        manager.filter(is_live=True, publication_end_date__gt=now).aggregate(
+            t=Min('publication_end_date'))['t'],
+    ]
+    times = [t for t in times if t is not None]
+    return min(times) if times else None
+
+
+def cache_timeout(model, default=None):
+    """
+    Seconds the result of ``active()`` stays valid, i.e. until the next
+    publication transition. ``default`` is returned if none is scheduled.
+    """
+    key = NEXT_TRANSITION_CACHE_KEY % model._meta.db_table
+    transition = cache.get(key)
+    if transition is None:
+        transition = next_transition(model) or False
+        cache.set(key, transition, default)
+
+    if not transition:
+        return default
+
+    delta = transition - timezone.now()
+    return max(int(delta.days * 86400 + delta.seconds), 1)
+
+
+class Extension(extensions.Extension):
+    def handle_model(self):
+        field_names = [f.name for f in self.model._meta.fields]
+        if 'publication_date' not in field_names or 'publication_end_date' not in field_names:
+            raise ImproperlyConfigured(
+                'Register feincms.module.extensions.datepublisher before '
+                'articles.extensions.publication_state')
+
+        self.model.add_to_class('is_live', models.BooleanField(
+            _('live'), default=False, editable=False, db_index=True))
+
+        pre_save.connect(update_is_live, sender=self.model)
+
+        # is_live replaces both the active flag and the date window checks
+        manager = self.model._default_manager.__class__
+        manager.active_filters.pop('simple-active', None)
+        manager.active_filters.pop('datepublisher', None)
+        manager.add_to_active_filters(Q(is_live=True), key='publication-state')
@@ -0,0 +1,60 @@
+"""
+Stores the rendered HTML of the regions listed in
+``ARTICLE_PRERENDERED_REGIONS`` (default: ``('summary',)``) on the article
+whenever it or its content is saved. The ``{% article_region %}`` tag used by
+the list templates and content types then outputs the stored HTML instead of
+rendering every content block on every request.
+
+Regions are rendered without a request, so don't prerender regions holding
+content that depends on it.
+"""
+import json
+
+from django.conf import settings
+from django.db import models
+from django.db.models.signals import post_save
+from django.template import Context
+from django.utils.safestring import mark_safe
+from django.utils.translation import ugettext_lazy as _
+from feincms import extensions
+
+from articles import signals
+
+
+def get_prerendered_regions():
+    return getattr(settings, 'ARTICLE_PRERENDERED_REGIONS', ('summary',))
+
+
+def render_regions(article):
+    from feincms.templatetags.feincms_tags import feincms_render_region
+    return json.dumps(dict(
+        (region, feincms_render_region(Context({}), article, region))
+        for region in get_prerendered_regions()))
+
+
+def update_rendered_regions(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # The content may have changed since it was loaded for this instance
+    instance.__dict__.pop('_content_proxy', None)
+    instance.rendered_regions = render_regions(instance)
+    instance._rendered_regions = None
+    sender._default_manager.filter(pk=instance.pk).update(rendered_regions=instance.rendered_regions)
+
+
+def get_rendered_region(self, region):
+    """The stored HTML of ``region``, or None if it isn't prerendered."""
+    if getattr(self, '_rendered_regions', None) is None:
+        self._rendered_regions = json.loads(self.rendered_regions or '{}')
+    rendered = self._rendered_regions.get(region)
+    return None if rendered is None else mark_safe(rendered)
+
+
+class Extension(extensions.Extension):
+    def handle_model(self):
+        self.model.add_to_class('rendered_regions', models.TextField(
+            _('rendered regions'), blank=True, default='', editable=False))
+        self.model.get_rendered_region = get_rendered_region
+
+        post_save.connect(update_rendered_regions, sender=self.model)
+        signals.content_saved.connect(update_rendered_regions, sender=self.model)
@@ -0,0 +1,153 @@
+"""
+Built-in full text search, for sites without Haystack.
+
+Keeps a tokenized copy of each article's text (its title and the plain text
+of its content, see ``ArticleManager.search_texts``) in ``search_text``. On
+PostgreSQL queries use ``to_tsvector`` and are ranked; create the matching
+index with ``manage.py update_article_search_text --create-index``. On SQLite
+the same option creates an FTS5 table, kept in sync by triggers, which ranks
+results with bm25. Without either, searches fall back to matching every token
+with ``LIKE '% token %'``, an unranked scan of all active articles that no
+index can serve.
+"""
+import re
+
+from django.conf import settings
+from django.conf.urls import patterns, url
+from django.db import connections, models
+from django.db.models.signals import post_save
+from django.utils.html import strip_tags
+from django.utils.translation import ugettext_lazy as _
+from feincms import extensions
+
+from articles import signals
+from articles.utils import filter_by_category_access
+
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(strip_tags(text).lower())
+
+
+def search_text_for(text):
+    # Padded with spaces so that whole tokens can be matched with LIKE
+    return u' %s ' % u' '.join(tokenize(text))
+
+
+def fts_table(model):
+    return '%s_fts' % model._meta.db_table
+
+
+def has_fts_table(connection, model):
+    """Whether the SQLite FTS5 table of ``model`` (see ``create_fts_table``) exists."""
+    if connection.vendor != 'sqlite':
+        return False
+    cursor = connection.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [fts_table(model)])
+    return cursor.fetchone() is not None
+
+
+def create_fts_table(connection, model):
+    """
+    Create the SQLite FTS5 table indexing ``search_text`` and fill it. Triggers
+    keep it in sync with the article table, queryset updates included.
+    """
+    qn = connection.ops.quote_name
+    names = {
+        'table': qn(model._meta.db_table),
+        'content': model._meta.db_table,
+        'fts': qn(fts_table(model)),
+        'pk': qn(model._meta.pk.column),
+        'pk_column': model._meta.pk.column,
+    }
+    delete = ("INSERT INTO %(fts)s(%(fts)s, rowid, search_text) "
+              "VALUES ('delete', old.%(pk)s, old.search_text);")
+    insert = "INSERT INTO %(fts)s(rowid, search_text) VALUES (new.%(pk)s, new.search_text);"
+    statements = [
+        "CREATE VIRTUAL TABLE %(fts)s USING fts5("
+        "search_text, content='%(content)s', content_rowid='%(pk_column)s')",
+        "CREATE TRIGGER %s AFTER INSERT ON %%(table)s BEGIN %s END" % (qn(fts_table(model) + '_insert'), insert),
+        "CREATE TRIGGER %s AFTER DELETE ON %%(table)s BEGIN %s END" % (qn(fts_table(model) + '_delete'), delete),
+        "CREATE TRIGGER %s AFTER UPDATE OF search_text ON %%(table)s BEGIN %s %s END" % (
+            qn(fts_table(model) + '_update'), delete, insert),
+        "INSERT INTO %(fts)s(%(fts)s) VALUES ('rebuild')",
+    ]
+    cursor = connection.cursor()
+    for statement in statements:
+        cursor.execute(statement % names)
+
+
+def search_articles(query, queryset=None, user=None):
+    """
+    Active articles matching all words in ``query``, best matches first
+    where the database can rank them.
+    """
+    from articles.models import Article
+
+    if queryset is None:
+        queryset = Article.objects.active()
+    model = queryset.model
+    queryset = filter_by_category_access(queryset, user)
+
+    tokens = tokenize(query)
+    if not tokens:
+        return queryset.none()
+
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        config = getattr(settings, 'ARTICLE_SEARCH_CONFIG', 'simple')
+        vector = "to_tsvector('%s', %s.search_text)" % (config, connection.ops.quote_name(model._meta.db_table))
+        tsquery = "plainto_tsquery('%s', %%s)" % config
+        return queryset.extra(
+            select={'search_rank': 'ts_rank(%s, %s)' % (vector, tsquery)},
+            select_params=[u' '.join(tokens)],
+            where=['%s @@ %s' % (vector, tsquery)],
+            params=[u' '.join(tokens)],
+            order_by=['-search_rank'])
+
+    if has_fts_table(connection, model):
+        table, fts = connection.ops.quote_name(model._meta.db_table), connection.ops.quote_name(fts_table(model))
+        # bm25 ranks are negative, best matches first
+        return queryset.extra(
+            select={'search_rank': '%s.rank' % fts},
+            tables=[fts_table(model)],
+            where=['%s MATCH %%s' % fts,
+                   '%s.rowid = %s.%s' % (fts, table, connection.ops.quote_name(model._meta.pk.column))],
+            params=[u' '.join(u'"%s"' % token for token in tokens)],
+            order_by=['search_rank'])
+
+    for token in tokens:
+        queryset = queryset.filter(search_text__contains=u' %s ' % token)
+    return queryset
+
+
+def update_search_text(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    manager = sender._default_manager
+    # Renders the content itself: the regions stored by the rendered_regions
+    # extension may not have been refreshed for this save yet
+    for pk, text in manager.search_texts(manager.filter(pk=instance.pk)):
+        instance.search_text = search_text_for(text)
+    manager.filter(pk=instance.pk).update(search_text=instance.search_text)
+
+
+class Extension(extensions.Extension):
+    def handle_model(self):
+        self.model.add_to_class('search_text', models.TextField(
+            _('search text'), blank=True, default='', editable=False))
+
+        post_save.connect(update_search_text, sender=self.model)
+        signals.content_saved.connect(update_search_text, sender=self.model)
+
+        self.model.get_urlpatterns_search_orig = self.model.get_urlpatterns
+
+        @classmethod
+        def get_urlpatterns(cls):
+            from articles import views
+            return patterns('',
+                url(r'^search/$', views.ArticleSearch.as_view(), name='article_search'),
+            ) + cls.get_urlpatterns_search_orig()
+        self.model.get_urlpatterns = get_urlpatterns
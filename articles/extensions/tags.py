@@ -1,8 +1,11 @@
 from django.conf.urls import patterns, url
 from django.core.exceptions import ImproperlyConfigured
+from django.db.models.signals import m2m_changed
 from django.utils.translation import ugettext_lazy as _
 from feincms import extensions
 
+from articles.cache import bump_generation_for_m2m
+
 try:
     from taggit.managers import TaggableManager
 except ImportError:
@@ -11,7 +14,9 @@ except ImportError:
 
 class Extension(extensions.Extension):
     def handle_model(self):
-        self.model.add_to_class('tags', TaggableManager(verbose_name=_('tags'), blank=True))
+        tags = TaggableManager(verbose_name=_('tags'), blank=True)
+        self.model.add_to_class('tags', tags)
+        m2m_changed.connect(bump_generation_for_m2m, sender=tags.through)
         self.model.get_urlpatterns_orig = self.model.get_urlpatterns
 
         @classmethod
@@ -25,6 +30,8 @@ class Extension(extensions.Extension):
         self.model.get_urlpatterns = get_urlpatterns
 
     def handle_modeladmin(self, modeladmin):
+        from articles.actions import edit_tags
+        modeladmin.actions = list(modeladmin.actions) + [edit_tags]
         modeladmin.add_extension_options(_('Tags'), {
             'fields': ('tags',),
         })
@@ -0,0 +1,32 @@
+from optparse import make_option
+
+from django.core.management.base import CommandError, NoArgsCommand
+
+from articles.extensions.rendered_regions import render_regions
+from articles.models import Article
+from articles.utils import bulk_update_column, chunked, parallel_map
+
+
+def render_chunk(pks):
+    rows = [(render_regions(article), article.pk) for article in Article.objects.filter(pk__in=pks)]
+    return bulk_update_column(Article, 'rendered_regions', rows)
+
+
+class Command(NoArgsCommand):
+    help = 'Rebuild the regions stored by articles.extensions.rendered_regions.'
+    option_list = NoArgsCommand.option_list + (
+        make_option('--processes', type='int', dest='processes', default=1,
+                    help='Number of worker processes rendering articles.'),
+        make_option('--chunk-size', type='int', dest='chunk_size', default=200,
+                    help='Number of articles rendered per batch.'),
+    )
+
+    def handle_noargs(self, **options):
+        if 'rendered_regions' not in [f.name for f in Article._meta.fields]:
+            raise CommandError('The articles.extensions.rendered_regions extension is not registered.')
+
+        pks = Article.objects.order_by('pk').values_list('pk', flat=True)
+        chunks = chunked(pks, options['chunk_size'])
+        count = sum(parallel_map(render_chunk, chunks, options['processes']))
+
+        self.stdout.write('Rendered the regions of %d articles' % count)
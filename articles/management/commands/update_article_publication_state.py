@@ -0,0 +1,15 @@
+from django.core.management.base import CommandError, NoArgsCommand
+
+from articles.extensions.publication_state import update_publication_state
+from articles.models import Article
+
+
+class Command(NoArgsCommand):
+    help = 'Flip Article.is_live for articles whose publication window opened or closed.'
+
+    def handle_noargs(self, **options):
+        if 'is_live' not in [f.name for f in Article._meta.fields]:
+            raise CommandError('The articles.extensions.publication_state extension is not registered.')
+
+        went_live, went_offline = update_publication_state(Article)
+        self.stdout.write('%d articles went live, %d went offline' % (len(went_live), len(went_offline)))
@@ -0,0 +1,52 @@
+from optparse import make_option
+
+from django.conf import settings
+from django.core.management.base import CommandError, NoArgsCommand
+from django.db import connections, router
+
+from articles.extensions.search import create_fts_table, search_text_for
+from articles.models import Article
+from articles.utils import bulk_update_column
+
+
+class Command(NoArgsCommand):
+    help = 'Rebuild the search text used by articles.extensions.search.'
+    option_list = NoArgsCommand.option_list + (
+        make_option('--create-index', action='store_true', dest='create_index', default=False,
+                    help='Create the full text index (PostgreSQL and SQLite only).'),
+        make_option('--chunk-size', type='int', dest='chunk_size', default=500,
+                    help='Number of articles updated per batch.'),
+    )
+
+    def handle_noargs(self, **options):
+        if 'search_text' not in [f.name for f in Article._meta.fields]:
+            raise CommandError('The articles.extensions.search extension is not registered.')
+
+        if options['create_index']:
+            self.create_index()
+
+        rows = []
+        count = 0
+        for pk, text in Article.objects.search_texts(chunk_size=options['chunk_size']):
+            rows.append((search_text_for(text), pk))
+            if len(rows) >= options['chunk_size']:
+                count += bulk_update_column(Article, 'search_text', rows)
+                rows = []
+        count += bulk_update_column(Article, 'search_text', rows)
+
+        self.stdout.write('Updated the search text of %d articles' % count)
+
+    def create_index(self):
+        connection = connections[router.db_for_write(Article)]
+        if connection.vendor == 'sqlite':
+            create_fts_table(connection, Article)
+            return
+        if connection.vendor != 'postgresql':
+            raise CommandError('--create-index is only supported on PostgreSQL and SQLite.')
+
+        table = Article._meta.db_table
+        connection.cursor().execute(
+            "CREATE INDEX %s ON %s USING gin(to_tsvector('%s', search_text))" % (
+                connection.ops.quote_name('%s_search_text_fts' % table),
+                connection.ops.quote_name(table),
+                getattr(settings, 'ARTICLE_SEARCH_CONFIG', 'simple')))
@@ -0,0 +1,129 @@
+from importlib import import_module
+from optparse import make_option
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, SESSION_KEY, get_user_model
+from django.core.management.base import CommandError, NoArgsCommand
+from django.db.models import get_model
+from django.test.client import Client
+
+from articles.cache import get_access_group_ids
+from articles.models import Article
+from articles.utils import chunked, parallel_map
+
+
+def is_article_content(content_type):
+    return any(base.__module__.startswith('articles.') for base in content_type.__mro__[1:])
+
+
+def log_in(client, user):
+    """Log ``client`` in as ``user`` without credentials nor login signals."""
+    engine = import_module(settings.SESSION_ENGINE)
+    session = engine.SessionStore()
+    session[SESSION_KEY] = user.pk
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    if hasattr(user, 'get_session_auth_hash'):
+        from django.contrib.auth import HASH_SESSION_KEY
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+
+
+def request_urls(job):
+    """Request ``urls`` as the user with pk ``user_pk`` (None: anonymous), return their status codes."""
+    host, user_pk, urls = job
+    client = Client(HTTP_HOST=host)
+    try:
+        if user_pk is not None:
+            log_in(client, get_user_model().objects.get(pk=user_pk))
+        return [(url, client.get(url).status_code) for url in urls]
+    finally:
+        if user_pk is not None:
+            client.logout()
+
+
+class Command(NoArgsCommand):
+    help = ('Warm article related caches after a deploy or cache flush by requesting '
+            'the category pages, the most requested articles and the FeinCMS pages '
+            'containing article content types, once per access variant.')
+    option_list = NoArgsCommand.option_list + (
+        make_option('--articles', type='int', dest='articles', default=100,
+                    help='Number of (most read, else newest) articles to request.'),
+        make_option('--concurrency', type='int', dest='concurrency', default=4,
+                    help='Number of worker processes requesting urls at the same time.'),
+        make_option('--host', dest='host', default=None,
+                    help='Host header sent with the requests (default: the first ALLOWED_HOSTS).'),
+    )
+
+    def handle_noargs(self, **options):
+        host = options['host'] or (settings.ALLOWED_HOSTS or ['localhost'])[0].lstrip('.')
+        if '*' in host:
+            raise CommandError('%r is not a valid host, pass --host.' % host)
+
+        urls = self.category_urls() + self.article_urls(options['articles']) + self.page_urls()
+        # Drop duplicates, keeping the order
+        seen = set()
+        urls = [url for url in urls if not (url in seen or seen.add(url))]
+
+        # One job per variant and worker, each with its own test client
+        concurrency = max(options['concurrency'], 1)
+        size = len(urls) // concurrency + 1
+        jobs = [(host, user_pk, chunk) for user_pk in self.variant_users() for chunk in chunked(urls, size)]
+        requested = 0
+        for results in parallel_map(request_urls, jobs, concurrency):
+            for url, status in results:
+                requested += 1
+                if int(options['verbosity']) > 1 or status != 200:
+                    self.stdout.write('%s %s' % (status, url))
+
+        self.stdout.write('Requested %d urls' % requested)
+
+    def variant_users(self):
+        """
+        The pk of one user per access variant (see ``articles.cache``): None
+        for anonymous users, one without access groups and one per
+        combination of access groups users belong to.
+        """
+        User = get_user_model()
+        group_ids = get_access_group_ids()
+        memberships = {}
+        for user_pk, group_pk in User.groups.through.objects.filter(
+                group__in=group_ids, user__is_active=True).values_list('user', 'group').order_by('user'):
+            memberships.setdefault(user_pk, set()).add(group_pk)
+
+        variants = {}
+        for user_pk, groups in sorted(memberships.items()):
+            variants.setdefault(frozenset(groups), user_pk)
+        other = User.objects.filter(is_active=True).exclude(pk__in=memberships.keys()).order_by('pk').first()
+        if other is not None:
+            variants.setdefault(frozenset(), other.pk)
+        return [None] + sorted(variants.values())
+
+    def category_urls(self):
+        if 'category' not in [f.name for f in Article._meta.fields]:
+            return []
+        from articles.modules.category.models import Category
+        return [category.get_absolute_url() for category in Category.objects.active()]
+
+    def article_urls(self, count):
+        if get_model('articles', 'MostReadArticle') is not None:
+            from articles.modules.popular.ranking import most_read
+            articles = list(most_read('week')[:count])
+        else:
+            articles = []
+        if len(articles) < count:
+            ordering = '-publication_date' if 'publication_date' in [f.name for f in Article._meta.fields] else '-pk'
+            articles += list(Article.objects.active().exclude(
+                pk__in=[a.pk for a in articles]).order_by(ordering)[:count - len(articles)])
+        return [article.get_absolute_url() for article in articles]
+
+    def page_urls(self):
+        Page = get_model('page', 'Page')
+        if Page is None:
+            return []
+
+        pages = set()
+        for content_type in Page._feincms_content_types:
+            if is_article_content(content_type):
+                pages.update(content_type.objects.values_list('parent', flat=True))
+        return [page.get_absolute_url() for page in Page.objects.active().filter(pk__in=pages)]
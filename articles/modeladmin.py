@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.urlresolvers import get_callable
+from django.db import models
+
+try:
+    from feincms.admin.item_editor import ItemEditor
+except ImportError:
+    from feincm.admin.editor import ItemEditor
+
+from . import signals
+from .actions import activate_articles, deactivate_articles
+from .changelist import EstimatedCountChangeList, EstimatedCountPaginator
+
+
+ExtensionModelAdmin = get_callable(getattr(
+    settings, 'ARTICLE_MODELADMIN_CLASS', 'feincms.extensions.ExtensionModelAdmin'))
+
+
+class ArticleAdmin(ItemEditor, ExtensionModelAdmin):
+    list_display = ['title', 'active']
+    list_filter = []
+    search_fields = ['title', 'slug']
+    actions = [activate_articles, deactivate_articles]
+    filter_horizontal = []
+    prepopulated_fields = {
+        'slug': ('title',),
+    }
+    fieldsets = [
+        (None, {
+            'fields': ['active', 'title', 'slug']
+        }),
+        # <-- insertion point, extensions appear here, see insertion_index above
+    ]
+
+    fieldset_insertion_index = 1
+
+    def __init__(self, *args, **kwargs):
+        super(ArticleAdmin, self).__init__(*args, **kwargs)
+
+        # Extensions have added their columns by now, join their foreign keys
+        if not self.list_select_related:
+            self.list_select_related = [
+                name for name in self.list_display
+                if name in self.opts.get_all_field_names() and
+                isinstance(self.opts.get_field_by_name(name)[0], models.ForeignKey)]
+
+        if getattr(settings, 'ARTICLE_ADMIN_HIGH_VOLUME', False):
+            # Prefix searches can use an index, leading wildcards can't
+            self.search_fields = ['^%s' % name.lstrip('^=@') for name in self.search_fields]
+            self.paginator = EstimatedCountPaginator
+
+    def get_changelist(self, request, **kwargs):
+        if getattr(settings, 'ARTICLE_ADMIN_HIGH_VOLUME', False):
+            return EstimatedCountChangeList
+        return super(ArticleAdmin, self).get_changelist(request, **kwargs)
+
+    def save_related(self, request, form, formsets, change):
+        super(ArticleAdmin, self).save_related(request, form, formsets, change)
+        signals.content_saved.send(sender=self.model, instance=form.instance)
@@ -1,5 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+
+from articles import cache, routing, signals
 from articles.bases import BaseArticle
 
 
 class Article(BaseArticle):
     pass
+
+
+post_save.connect(routing.stick_to_primary, sender=Article)
+post_delete.connect(routing.stick_to_primary, sender=Article)
+post_save.connect(cache.bump_generation, sender=Article)
+post_delete.connect(cache.bump_generation, sender=Article)
+signals.articles_bulk_updated.connect(cache.bump_generation, sender=Article)
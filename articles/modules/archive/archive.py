@@ -0,0 +1,38 @@
+"""
+Archive months read from the maintained ``ArchiveMonth`` counts.
+"""
+from datetime import date
+
+from django.conf import settings
+from django.db.models import Sum
+
+from articles.utils import app_permalink, filter_by_category_access
+
+from .models import ArchiveMonth
+
+
+@app_permalink
+def month_url(year, month, category=None):
+    if category is None:
+        return ('article_archive_month', 'articles.urls', (), {'year': year, 'month': month})
+    return ('article_category_archive_month', 'articles.urls', (), {
+        'category_url': category.local_url, 'year': year, 'month': month})
+
+
+def archive_months(category=None, user=None):
+    """
+    [{'date', 'count', 'url'}] of the months with active articles (of
+    ``category``) the user may access, newest first.
+    """
+    months = filter_by_category_access(ArchiveMonth.objects.filter(count__gt=0), user)
+
+    if category is not None:
+        if getattr(settings, 'ARTICLE_SHOW_DESCENDANTS', False):
+            months = months.filter(category_id__in=category.get_descendants(include_self=True).values('pk'))
+        else:
+            months = months.filter(category_id=category.pk)
+
+    months = months.values('year', 'month').annotate(total=Sum('count')).order_by('-year', '-month')
+    return [{'date': date(m['year'], m['month'], 1),
+             'count': m['total'],
+             'url': month_url(m['year'], m['month'], category)} for m in months]
@@ -0,0 +1,37 @@
+from django.conf.urls import patterns, url
+from django.core.exceptions import ImproperlyConfigured
+from feincms import extensions
+
+
+class Extension(extensions.Extension):
+    def handle_model(self):
+        field_names = [f.name for f in self.model._meta.fields]
+        if 'publication_date' not in field_names:
+            raise ImproperlyConfigured(
+                'Register feincms.module.extensions.datepublisher before '
+                'articles.modules.archive.extensions.archive')
+
+        # Month pages are range queries on the publication date
+        self.model._meta.index_together = list(self.model._meta.index_together) + [('publication_date',)]
+
+        self.model.get_urlpatterns_archive_orig = self.model.get_urlpatterns
+
+        @classmethod
+        def get_urlpatterns(cls):
+            from articles.modules.archive import views
+            urlpatterns = patterns('',
+                url(r'^archive/(?P<year>\d{4})/$', views.ArticleArchive.as_view(), name='article_archive_year'),
+                url(r'^archive/(?P<year>\d{4})/(?P<month>\d{1,2})/$', views.ArticleArchive.as_view(),
+                    name='article_archive_month'),
+            )
+            # Checked here so that the category extension may come before or after this one
+            if 'category' in [f.name for f in cls._meta.fields]:
+                from articles.modules.category import views
+                urlpatterns += patterns('',
+                    url(r'^(?P<category_url>[a-z0-9_/-]+/)archive/(?P<year>\d{4})/$',
+                        views.CategoryArticleArchive.as_view(), name='article_category_archive_year'),
+                    url(r'^(?P<category_url>[a-z0-9_/-]+/)archive/(?P<year>\d{4})/(?P<month>\d{1,2})/$',
+                        views.CategoryArticleArchive.as_view(), name='article_category_archive_month'),
+                )
+            return urlpatterns + cls.get_urlpatterns_archive_orig()
+        self.model.get_urlpatterns = get_urlpatterns
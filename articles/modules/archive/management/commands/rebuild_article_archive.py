@@ -0,0 +1,11 @@
+from django.core.management.base import NoArgsCommand
+
+from articles.modules.archive.models import ArchiveMonth, rebuild_archive
+
+
+class Command(NoArgsCommand):
+    help = 'Recompute the per month article counts of the archive.'
+
+    def handle_noargs(self, **options):
+        rebuild_archive()
+        self.stdout.write('Rebuilt %d archive months' % ArchiveMonth.objects.count())
@@ -0,0 +1,148 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, connections, models, router, transaction
+from django.db.models.loading import get_model
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+
+from articles import signals
+from articles.models import Article
+
+
+class ArchiveMonth(models.Model):
+    """
+    Number of active articles published in a month, per category (0 without
+    the category extension). Maintained by the receivers below, which also
+    drop the months of deleted categories; rebuild it with ``manage.py
+    rebuild_article_archive``.
+    """
+    category_id = models.PositiveIntegerField(_('category'), default=0)
+    year = models.PositiveIntegerField(_('year'))
+    month = models.PositiveIntegerField(_('month'))
+    count = models.PositiveIntegerField(_('articles'), default=0)
+
+    class Meta:
+        app_label = 'articles'
+        ordering = ['-year', '-month']
+        unique_together = [('category_id', 'year', 'month')]
+        verbose_name = _('archive month')
+        verbose_name_plural = _('archive months')
+
+
+def field_names(model):
+    return [f.name for f in model._meta.fields]
+
+
+def local_month(value):
+    if settings.USE_TZ and timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.year, value.month
+
+
+def month_counts(queryset):
+    """{(category id, year, month): count} of ``queryset``, grouped in the database."""
+    has_category = 'category' in field_names(queryset.model)
+    columns = ['category', 'publication_date'] if has_category else ['publication_date']
+    inner, params = queryset.order_by().values_list(*columns).query.sql_with_params()
+
+    connection = connections[queryset.db]
+    tzname = timezone.get_current_timezone_name() if settings.USE_TZ else None
+    year, year_params = connection.ops.datetime_extract_sql('year', 'archive.publication_date', tzname)
+    month, month_params = connection.ops.datetime_extract_sql('month', 'archive.publication_date', tzname)
+    # A constant in GROUP BY would be read as a column position
+    category, group_by = ('archive.category_id', 'archive.category_id, ') if has_category else ('0', '')
+
+    sql = 'SELECT %s, %s, %s, COUNT(*) FROM (%s) archive GROUP BY %s%s, %s' % (
+        category, year, month, inner, group_by, year, month)
+    cursor = connection.cursor()
+    cursor.execute(sql, tuple(year_params) + tuple(month_params) + tuple(params) +
+                   tuple(year_params) + tuple(month_params))
+    return dict(((category_id, int(y), int(m)), count) for category_id, y, m, count in cursor.fetchall())
+
+
+def rebuild_archive():
+    """Recompute the whole archive table from the active articles."""
+    counts = month_counts(Article.objects.active())
+    with transaction.atomic():
+        ArchiveMonth.objects.all().delete()
+        ArchiveMonth.objects.bulk_create([
+            ArchiveMonth(category_id=category_id, year=year, month=month, count=count)
+            for (category_id, year, month), count in counts.items()])
+
+
+def adjust_month(category_id, year, month, delta):
+    months = ArchiveMonth.objects.filter(category_id=category_id, year=year, month=month)
+    if months.update(count=models.F('count') + delta) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            ArchiveMonth.objects.create(category_id=category_id, year=year, month=month, count=delta)
+    except IntegrityError:
+        # Created concurrently
+        months.update(count=models.F('count') + delta)
+
+
+def counted_month(sender, instance):
+    """The (category id, year, month) an article is counted in, None if it isn't active."""
+    if instance.pk is None:
+        return None
+    has_category = 'category' in field_names(sender)
+    columns = ['category', 'publication_date'] if has_category else ['publication_date']
+    manager = sender._default_manager.db_manager(router.db_for_write(sender))
+    row = manager.active().filter(pk=instance.pk).values_list(*columns).first()
+    if row is None or row[-1] is None:
+        return None
+    return (row[0] if has_category else 0,) + local_month(row[-1])
+
+
+def remember_counted_month(sender, instance, raw=False, **kwargs):
+    if not raw and 'publication_date' in field_names(sender):
+        instance._archive_month = counted_month(sender, instance)
+
+
+def update_archive(sender, instance, raw=False, **kwargs):
+    """Move an article's count if it changed month, category or active state."""
+    if raw or 'publication_date' not in field_names(sender):
+        return
+    old = getattr(instance, '_archive_month', None)
+    new = None if kwargs.get('signal') is post_delete else counted_month(sender, instance)
+    if old != new:
+        if old is not None:
+            adjust_month(*old, delta=-1)
+        if new is not None:
+            adjust_month(*new, delta=1)
+
+
+def update_published_archive(sender, went_live, went_offline, **kwargs):
+    has_category = 'category' in field_names(sender)
+    columns = ['category', 'publication_date'] if has_category else ['publication_date']
+    deltas = defaultdict(int)
+    for pks, delta in ((went_live, 1), (went_offline, -1)):
+        for row in sender._default_manager.filter(pk__in=pks).values_list(*columns).iterator():
+            deltas[(row[0] if has_category else 0,) + local_month(row[-1])] += delta
+    for key, delta in deltas.items():
+        if delta:
+            adjust_month(*key, delta=delta)
+
+
+def rebuild_bulk_updated_archive(sender, fields, **kwargs):
+    if 'publication_date' in field_names(sender) and ('active' in fields or 'category' in fields):
+        rebuild_archive()
+
+
+def delete_category_months(sender, instance, **kwargs):
+    """Drop the months of a deleted category, ``category_id`` isn't a foreign key."""
+    if sender is get_model('articles', 'Category'):
+        ArchiveMonth.objects.filter(category_id=instance.pk).delete()
+
+
+pre_save.connect(remember_counted_month, sender=Article)
+post_save.connect(update_archive, sender=Article)
+pre_delete.connect(remember_counted_month, sender=Article)
+post_delete.connect(update_archive, sender=Article)
+signals.publication_changed.connect(update_published_archive, sender=Article)
+signals.articles_bulk_updated.connect(rebuild_bulk_updated_archive, sender=Article)
+# The category model may not be installed, so the sender is checked on delete
+post_delete.connect(delete_category_months)
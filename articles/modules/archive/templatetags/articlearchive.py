@@ -0,0 +1,20 @@
+from django import template
+
+from articles.modules.archive.archive import archive_months
+
+register = template.Library()
+
+
+@register.assignment_tag(takes_context=True)
+def article_archive(context, category=None):
+    """
+    Months with active articles (of ``category``), newest first, each with
+    ``date``, ``count`` and the ``url`` of its archive page.
+
+    Usage:
+        {% article_archive as months %}
+        OR
+        {% article_archive category as months %}
+    """
+    user = 'request' in context and context['request'].user or None
+    return archive_months(category, user=user)
@@ -0,0 +1,49 @@
+from datetime import date, datetime
+
+from django.conf import settings
+from django.http import Http404
+from django.utils import timezone
+
+from articles.utils import filter_by_category_access
+from articles.views import ArticleList
+
+
+class ArchiveMixin(object):
+    """Limit an article list to the year (and month) in the url."""
+
+    def get_date_range(self):
+        year = int(self.kwargs['year'])
+        month = self.kwargs.get('month')
+        try:
+            if month:
+                start = datetime(year, int(month), 1)
+                end = datetime(year + int(month) // 12, int(month) % 12 + 1, 1)
+            else:
+                start, end = datetime(year, 1, 1), datetime(year + 1, 1, 1)
+        except ValueError:
+            raise Http404
+
+        if settings.USE_TZ:
+            start, end = timezone.make_aware(start, timezone.get_current_timezone()), \
+                timezone.make_aware(end, timezone.get_current_timezone())
+        return start, end
+
+    def get_queryset(self):
+        start, end = self.get_date_range()
+        return super(ArchiveMixin, self).get_queryset().filter(
+            publication_date__gte=start, publication_date__lt=end).order_by('-publication_date', '-pk')
+
+    def get_context_data(self, **kwargs):
+        context = super(ArchiveMixin, self).get_context_data(**kwargs)
+        context['year'] = int(self.kwargs['year'])
+        if self.kwargs.get('month'):
+            context['month'] = date(context['year'], int(self.kwargs['month']), 1)
+        return context
+
+
+class ArticleArchive(ArchiveMixin, ArticleList):
+    template_name = 'articles/article_archive.html'
+
+    def get_queryset(self):
+        articles = super(ArticleArchive, self).get_queryset()
+        return filter_by_category_access(articles, self.request.user)
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Category, CategoryAdmin
+from .modeladmin import CategoryAdmin
+from .models import Category
 
 
 admin.site.register(Category, CategoryAdmin)
@@ -1,11 +1,11 @@
 from django import forms
 from django.db import models
-from django.contrib.admin.widgets import AdminRadioSelect
 from django.template.loader import render_to_string
 from django.utils.translation import ugettext_lazy as _
-from feincms.admin.item_editor import ItemEditorForm
 
 from articles.models import Article
+from articles.cache import cached_render
+from articles.querybudget import query_budget
 
 
 class ArticleCategoryList(models.Model):
@@ -15,12 +15,17 @@ class ArticleCategoryList(models.Model):
     category = models.ForeignKey('articles.Category')
     number = models.IntegerField()
 
+    #: Maximum number of queries a render may run, see ``articles.querybudget``
+    query_budget = None
+
     class Meta:
         abstract = True
         verbose_name = _('article category list')
 
     @classmethod
     def initialize_type(cls, LAYOUT_CHOICES=None):
+        from django.contrib.admin.widgets import AdminRadioSelect
+        from feincms.admin.item_editor import ItemEditorForm
 
         cls.add_to_class('layout', models.CharField(_('Layout'),
                                                     max_length=10, choices=LAYOUT_CHOICES,
@@ -37,18 +42,20 @@ class ArticleCategoryList(models.Model):
     def get_queryset_for_render(self):
         return Article.objects.filter(category=self.category)
 
+    @cached_render
     def render(self, **kwargs):
         context = {
             'object_list': self.get_queryset_for_render()[:self.number],
             'request': kwargs.get('request'),
             'content': self,
         }
-        return render_to_string([
-            'content/articles/category/%s/%s.html' % (self.region, self.layout),
-            'content/articles/category/%s/default.html' % self.region,
-            'content/articles/category/%s.html' % self.layout,
-            'content/articles/category/default.html',
-            ], context)
+        with query_budget(self.query_budget, self.__class__.__name__):
+            return render_to_string([
+                'content/articles/category/%s/%s.html' % (self.region, self.layout),
+                'content/articles/category/%s/default.html' % self.region,
+                'content/articles/category/%s.html' % self.layout,
+                'content/articles/category/default.html',
+                ], context)
 
 
 class ArticleList(models.Model):
@@ -59,6 +66,9 @@ class ArticleList(models.Model):
     number = models.IntegerField()
     categories = models.ManyToManyField('articles.Category', null=True, blank=True)
 
+    #: Maximum number of queries a render may run, see ``articles.querybudget``
+    query_budget = None
+
     class Meta:
         abstract = True
         verbose_name = _('article list')
@@ -69,13 +79,15 @@ class ArticleList(models.Model):
             articles = articles.filter(category__in=self.categories.all())
         return articles
 
+    @cached_render
     def render(self, **kwargs):
         context = {
             'object_list': self.get_queryset_for_render()[:self.number],
             'request': kwargs.get('request'),
             'content': self,
         }
-        return render_to_string(['content/articles/%s/list.html' % self.region,
-                                 'content/articles/list.html',
-                                ],
-                                context)
+        with query_budget(self.query_budget, self.__class__.__name__):
+            return render_to_string(['content/articles/%s/list.html' % self.region,
+                                     'content/articles/list.html',
+                                    ],
+                                    context)
@@ -1,26 +1,107 @@
+from django.conf import settings
 from django.conf.urls import patterns, url
-from django.db import models
+from django.db import models, router
+from django.db.models.loading import get_model
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.utils.translation import ugettext_lazy as _
-from feincms.content.application import models as app_models
 
 from feincms import extensions
 
+from articles import signals
+from articles.utils import app_permalink
+
+
+def get_category_model():
+    return get_model('articles', 'Category')
+
+
+def counted_category(sender, instance):
+    """The category an article is counted in, None if it isn't active."""
+    if instance.pk is None:
+        return None
+    manager = sender._default_manager.db_manager(router.db_for_write(sender))
+    return manager.active().filter(pk=instance.pk).values_list('category_id', flat=True).first()
+
+
+def remember_counted_category(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance._counted_category = counted_category(sender, instance)
+
+
+def update_article_counts(sender, instance, raw=False, **kwargs):
+    """Move an article's count if it changed category or active state."""
+    if raw:
+        return
+    old = getattr(instance, '_counted_category', None)
+    new = None if kwargs.get('signal') is post_delete else counted_category(sender, instance)
+    if old != new:
+        if old is not None:
+            get_category_model().objects.adjust_article_count(old, -1)
+        if new is not None:
+            get_category_model().objects.adjust_article_count(new, 1)
+
+
+def update_published_article_counts(sender, went_live, went_offline, **kwargs):
+    for pks, delta in ((went_live, 1), (went_offline, -1)):
+        categories = (sender._default_manager.filter(pk__in=pks).order_by()
+                                             .values_list('category').annotate(count=models.Count('pk')))
+        for category_id, count in categories:
+            get_category_model().objects.adjust_article_count(category_id, delta * count)
+
+
+def rebuild_article_counts(sender, fields, **kwargs):
+    if 'active' in fields or 'category' in fields:
+        get_category_model().objects.rebuild_article_counts()
+
+
+def connect_article_counts(model):
+    pre_save.connect(remember_counted_category, sender=model)
+    post_save.connect(update_article_counts, sender=model)
+    pre_delete.connect(remember_counted_category, sender=model)
+    post_delete.connect(update_article_counts, sender=model)
+    signals.publication_changed.connect(update_published_article_counts, sender=model)
+    signals.articles_bulk_updated.connect(rebuild_article_counts, sender=model)
+
 
 class Extension(extensions.Extension):
 
     def handle_model(self):
         self.model.add_to_class('category', models.ForeignKey('articles.Category', verbose_name=_('category')))
         self.model._meta.unique_together += [('category', 'slug')]
-        self.model.get_urlpatterns_orig = self.model.get_urlpatterns
+        connect_article_counts(self.model)
+
+        # Listings and previous/next navigation seek on (category, order field)
+        field_names = [f.name for f in self.model._meta.fields]
+        self.model._meta.index_together = list(self.model._meta.index_together) + [
+            fields for fields in [('category', 'title'), ('category', 'publication_date')]
+            if fields[1] in field_names]
+
+        def get_previous_in_category(self):
+            from articles.modules.category.navigation import get_neighbours
+            return get_neighbours(self)[0]
+        self.model.get_previous_in_category = get_previous_in_category
+
+        def get_next_in_category(self):
+            from articles.modules.category.navigation import get_neighbours
+            return get_neighbours(self)[1]
+        self.model.get_next_in_category = get_next_in_category
+
+        self.model.get_urlpatterns_category_orig = self.model.get_urlpatterns
 
         @classmethod
         def get_urlpatterns(cls):
             from articles.modules.category import views
-            return patterns('',
+            urlpatterns = patterns('',
                     url(r'^(?P<category_url>[a-z0-9_/-]+/)articles/(?P<slug>[a-z0-9_-]+)/$', views.CategoryArticleDetail.as_view(), name="article_detail"),
                     url(r'^(?P<category_url>[a-z0-9_/-]+/)articles/$', views.CategoryArticleList.as_view(), name='article_category'),
                     url(r'^$', views.CategoryArticleList.as_view(), name='article_index'),
             )
+            # Keep the urls of the extensions registered before this one, but
+            # not the plain index and detail views: they would bypass the
+            # access groups of the categories
+            replaced = [pattern.name for pattern in urlpatterns]
+            return urlpatterns + [pattern for pattern in cls.get_urlpatterns_category_orig()
+                                  if getattr(pattern, 'name', None) not in replaced]
         self.model.get_urlpatterns = get_urlpatterns
 
         def get_absolute_url(self):
@@ -28,11 +109,18 @@ class Extension(extensions.Extension):
                     'category_url': self.category.local_url,
                     'slug': self.slug,
                     })
-        self.model.get_absolute_url = app_models.permalink(get_absolute_url)
+        self.model.get_absolute_url = app_permalink(get_absolute_url)
 
     def handle_modeladmin(self, modeladmin):
-        modeladmin.list_filter += ['category', ]
+        if getattr(settings, 'ARTICLE_ADMIN_HIGH_VOLUME', False):
+            from articles.modules.category.filters import CategoryAutocompleteFilter
+            modeladmin.list_filter += [CategoryAutocompleteFilter, ]
+        else:
+            modeladmin.list_filter += ['category', ]
         modeladmin.list_display.insert(1, 'category', )
+
+        from articles.actions import move_to_category
+        modeladmin.actions = list(modeladmin.actions) + [move_to_category]
         modeladmin.add_extension_options(_('Category'), {
             'fields': ('category',),
         })
@@ -0,0 +1,35 @@
+from django.contrib import admin
+from django.utils.translation import ugettext_lazy as _
+
+from .models import Category
+
+
+class CategoryAutocompleteFilter(admin.SimpleListFilter):
+    """
+    Category filter for large trees: instead of listing every category in
+    the sidebar it shows a text field completed from the ``CategoryAdmin``
+    autocomplete view, and filters on the (unique) category slug.
+    """
+    title = _('category')
+    parameter_name = 'category'
+    template = 'admin/articles/category_autocomplete_filter.html'
+
+    def has_output(self):
+        return True
+
+    def lookups(self, request, model_admin):
+        if self.value():
+            return Category.objects.filter(slug=self.value()).values_list('slug', 'name')
+        return []
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(category__slug=self.value())
+        return queryset
+
+    def choices(self, cl):
+        params = cl.get_filters_params()
+        params.pop(self.parameter_name, None)
+        for choice in super(CategoryAutocompleteFilter, self).choices(cl):
+            choice['params'] = sorted(params.items())
+            yield choice
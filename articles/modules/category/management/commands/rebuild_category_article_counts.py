@@ -0,0 +1,11 @@
+from django.core.management.base import NoArgsCommand
+
+from articles.modules.category.models import Category
+
+
+class Command(NoArgsCommand):
+    help = 'Recompute the maintained counts of active articles of every category.'
+
+    def handle_noargs(self, **options):
+        Category.objects.rebuild_article_counts()
+        self.stdout.write('Updated the article counts of %d categories' % Category.objects.count())
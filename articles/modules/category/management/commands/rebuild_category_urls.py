@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from articles.modules.category.models import Category
+
+
+class Command(BaseCommand):
+    args = '[category_slug ...]'
+    help = 'Rebuild Category.local_url for the given categories and their descendants (default: all).'
+
+    def handle(self, *slugs, **options):
+        if not slugs:
+            roots = [None]
+        else:
+            roots = []
+            for slug in slugs:
+                try:
+                    roots.append(Category.objects.get(slug=slug))
+                except Category.DoesNotExist:
+                    raise CommandError('Category "%s" does not exist' % slug)
+
+        updated = sum(Category.objects.rebuild_local_urls(root) for root in roots)
+        self.stdout.write('Updated %d category urls' % updated)
@@ -0,0 +1,162 @@
+import copy
+import json
+
+from django.conf import settings
+from django.conf.urls import patterns, url
+from django.contrib.admin.views.main import ChangeList as BaseChangeList
+from django.core.urlresolvers import get_callable, reverse
+from django.db.models import Q
+from django.http import Http404, HttpResponse, QueryDict
+from django.template.response import TemplateResponse
+from django.utils.safestring import mark_safe
+from feincms.admin import tree_editor as editor
+
+
+ModelAdmin = get_callable(getattr(settings, 'CATEGORY_MODELADMIN_CLASS', 'django.contrib.admin.ModelAdmin'))
+
+
+def is_lazy_tree():
+    return getattr(settings, 'CATEGORY_ADMIN_LAZY_TREE', getattr(settings, 'ARTICLE_ADMIN_HIGH_VOLUME', False))
+
+
+class LazyTreeChangeList(editor.ChangeList):
+    """
+    Lists the root categories only, their descendants are loaded on expand.
+    Searches and filters list the matching categories (and their ancestors
+    with ``FEINCMS_TREE_EDITOR_INCLUDE_ANCESTORS``) instead.
+    """
+
+    def is_browsing(self):
+        return not self.query and not self.get_filters_params()
+
+    def get_queryset(self, request):
+        queryset = super(LazyTreeChangeList, self).get_queryset(request)
+        if self.is_browsing():
+            queryset = queryset.filter(parent__isnull=True)
+        return queryset
+
+    def get_results(self, request):
+        if not self.is_browsing():
+            return super(LazyTreeChangeList, self).get_results(request)
+
+        # Roots have no ancestors, skip the tree editor's query for them
+        BaseChangeList.get_results(self, request)
+        for item in self.result_list:
+            item.feincms_changeable = self.model_admin.has_change_permission(request, item)
+            item.feincms_addable = item.feincms_changeable and self.model_admin.has_add_permission(request, item)
+
+
+class CategoryAdmin(editor.TreeEditor, ModelAdmin):
+    list_display = ['name', 'order_by']
+    list_filter = ['parent',]
+    prepopulated_fields = {
+        'slug': ('name',),
+    }
+
+    def __init__(self, *args, **kwargs):
+        super(CategoryAdmin, self).__init__(*args, **kwargs)
+        self.lazy_tree = is_lazy_tree()
+        if self.lazy_tree:
+            self.search_fields = ['name', 'slug']
+            self.list_per_page = 100
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return patterns('',
+            url(r'^autocomplete/$', self.admin_site.admin_view(self.autocomplete_view),
+                name='%s_%s_autocomplete' % info),
+            url(r'^children/$', self.admin_site.admin_view(self.children_view),
+                name='%s_%s_children' % info),
+        ) + super(CategoryAdmin, self).get_urls()
+
+    def get_changelist(self, request, **kwargs):
+        if self.lazy_tree:
+            return LazyTreeChangeList
+        return super(CategoryAdmin, self).get_changelist(request, **kwargs)
+
+    def changelist_view(self, request, extra_context=None, *args, **kwargs):
+        if not self.lazy_tree or request.is_ajax():
+            return super(CategoryAdmin, self).changelist_view(request, extra_context, *args, **kwargs)
+
+        # TreeEditor would build the structure of the whole tree, only
+        # describe the listed rows
+        if 'actions_column' not in self.list_display:
+            self.list_display.append('actions_column')
+        self._refresh_changelist_caches()
+
+        response = super(editor.TreeEditor, self).changelist_view(request, extra_context, *args, **kwargs)
+        if isinstance(response, TemplateResponse) and 'cl' in response.context_data:
+            response.context_data.update(self.lazy_tree_context(response.context_data['cl'].result_list))
+        return response
+
+    def lazy_tree_context(self, items):
+        listed = set(item.pk for item in items)
+        structure = dict((item.pk, []) for item in items)
+        for item in items:
+            if item.parent_id in listed:
+                structure[item.parent_id].append(item.pk)
+        unloaded = [item.pk for item in items if not structure[item.pk] and not item.is_leaf_node()]
+
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return {
+            'tree_structure': mark_safe(json.dumps(structure)),
+            'lazy_nodes': mark_safe(json.dumps(unloaded)),
+            'children_url': reverse('admin:%s_%s_children' % info, current_app=self.admin_site.name),
+        }
+
+    def changelist_rows(self, request, items):
+        """The changelist row (``<tr>``) of each of ``items``, as listed by the tree editor."""
+        from django.contrib.admin.templatetags.admin_list import items_for_result
+
+        if 'actions_column' not in self.list_display:
+            self.list_display.append('actions_column')
+        list_display = self.get_list_display(request)
+        if self.get_actions(request):
+            list_display = ['action_checkbox'] + list(list_display)
+
+        # Only the columns matter, not what the parameters would list
+        listing = copy.copy(request)
+        listing.GET = QueryDict('')
+        cl = self.get_changelist(request)(
+            listing, self.model, list_display, self.get_list_display_links(request, list_display),
+            self.get_list_filter(request), self.date_hierarchy, self.search_fields, self.list_select_related,
+            self.list_per_page, self.list_max_show_all, self.list_editable, self)
+
+        rows = []
+        for item in items:
+            item.feincms_changeable = self.has_change_permission(request, item)
+            item.feincms_addable = item.feincms_changeable and self.has_add_permission(request, item)
+            rows.append(u'<tr>%s</tr>' % u''.join(items_for_result(cl, item, None)))
+        return rows
+
+    def children_view(self, request):
+        """
+        JSON list of the children of the category ``parent`` (or of the
+        roots), each with its rendered changelist row.
+        """
+        queryset = self.get_queryset(request)
+        if request.GET.get('parent'):
+            try:
+                tree_id, lft, rght, level = queryset.filter(pk=request.GET['parent']).values_list(
+                    'tree_id', 'lft', 'rght', 'level')[0]
+            except (IndexError, ValueError):
+                raise Http404
+            queryset = queryset.filter(tree_id=tree_id, lft__gt=lft, rght__lt=rght, level=level + 1)
+        else:
+            queryset = queryset.filter(parent__isnull=True)
+
+        children = list(queryset.order_by('tree_id', 'lft'))
+        rows = self.changelist_rows(request, children)
+        data = [{
+            'pk': child.pk,
+            'has_children': not child.is_leaf_node(),
+            'row': row,
+        } for child, row in zip(children, rows)]
+        return HttpResponse(json.dumps(data), content_type='application/json')
+
+    def autocomplete_view(self, request):
+        """JSON list of the first categories whose slug or name starts with ``q``."""
+        query = request.GET.get('q', '')
+        categories = self.get_queryset(request).filter(
+            Q(slug__startswith=query) | Q(name__istartswith=query)).values('pk', 'name', 'slug')[:20]
+        return HttpResponse(json.dumps(list(categories)), content_type='application/json')
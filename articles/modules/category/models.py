@@ -1,32 +1,156 @@
 import mptt
-from denorm import denormalized, depend_on_related
+from denorm import denormalized
 from django.conf import settings
-from django.core.urlresolvers import get_callable
 from django.db import models
 from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.translation import ugettext_lazy as _
-from feincms.admin import tree_editor as editor
-from feincms.content.application import models as app_models
 
+from articles import routing
+from articles.cache import (CachedManagerMixin, bump_generation, bump_generation_for_m2m, get_cache_variant,
+                            get_generation, get_or_compute)
 from articles.models import Article
+from articles.utils import app_permalink, bulk_update_column, deprecated_imports
 
 
-class CategoryManager(models.Manager):
+VISIBLE_COUNTS_KEY = 'articles:category:visible-counts:%s:%s'
 
-    def active_query(self, user=None):
+
+class CategoryManager(CachedManagerMixin, models.Manager):
+
+    def active_query(self, user=None, prefix=''):
+        """
+        Categories the user may access. Pass ``prefix='category__'`` to filter
+        articles instead.
+        """
 
         if user is not None and user.is_authenticated():
-            query = Q(access_groups__isnull=True) | Q(access_groups__in=user.groups.all())
+            query = Q(**{prefix + 'access_groups__isnull': True}) | Q(**{prefix + 'access_groups__in': user.groups.all()})
         else:
-            query = Q(access_groups__isnull=True)
+            query = Q(**{prefix + 'access_groups__isnull': True})
 
         return query
 
     def active(self, user=None):
         """Active categories (containing active articles)"""
 
-        return self.filter(self.active_query(user=user)).distinct()
+        return routing.route_read(self.filter(self.active_query(user=user)).distinct())
+
+    def rebuild_local_urls(self, root=None):
+        """
+        Recompute ``local_url`` for ``root`` and its descendants (or every
+        category) in one ordered pass, writing only the rows that changed.
+        """
+        if root is None:
+            nodes = self.all()
+            urls = {}
+        else:
+            nodes = root.get_descendants(include_self=True)
+            urls = {root.parent_id: root.parent.local_url if root.parent_id else ''}
+
+        # MPTT order guarantees a parent is visited before its children
+        nodes = nodes.order_by('tree_id', 'lft').values_list('pk', 'parent_id', 'slug', 'local_url')
+
+        changed = []
+        for pk, parent_id, slug, local_url in nodes.iterator():
+            urls[pk] = u'%s%s/' % (urls.get(parent_id, ''), slug)
+            if urls[pk] != local_url:
+                changed.append((urls[pk], pk))
+
+        updated = bulk_update_column(self.model, 'local_url', changed)
+        bump_generation(self.model)
+        return updated
+
+    def rebuild_article_counts(self):
+        """
+        Recompute the direct and subtree counts of active articles of every
+        category in one pass, writing only the rows that changed.
+        """
+        direct = dict(Article.objects.active().order_by().values_list('category')
+                                     .annotate(count=models.Count('pk')))
+
+        # Reversed MPTT order visits all descendants before their ancestor
+        nodes = self.order_by('-tree_id', '-lft').values_list(
+            'pk', 'parent_id', 'article_count', 'descendant_article_count')
+
+        subtree = {}
+        changed_direct, changed_subtree = [], []
+        for pk, parent_id, article_count, descendant_article_count in nodes.iterator():
+            subtree[pk] = subtree.get(pk, 0) + direct.get(pk, 0)
+            if parent_id is not None:
+                subtree[parent_id] = subtree.get(parent_id, 0) + subtree[pk]
+            if article_count != direct.get(pk, 0):
+                changed_direct.append((direct.get(pk, 0), pk))
+            if descendant_article_count != subtree[pk]:
+                changed_subtree.append((subtree[pk], pk))
+
+        bulk_update_column(self.model, 'article_count', changed_direct)
+        bulk_update_column(self.model, 'descendant_article_count', changed_subtree)
+        bump_generation(self.model)
+
+    def visible_article_counts(self, user=None):
+        """
+        Return {category pk: active articles in the category and the
+        subcategories ``user`` may access}, computed for all categories in one
+        pass. Cached per generation and access variant, and on ``user`` for
+        the rest of the request.
+        """
+        generation = get_generation(Article, self.model, self.model.access_groups.through)
+        memo = getattr(user, '_articles_visible_counts', None)
+        if memo is not None and memo[0] == generation:
+            return memo[1]
+
+        def compute():
+            visible = set(self.filter(self.active_query(user=user)).values_list('pk', flat=True))
+            # Reversed MPTT order visits all descendants before their ancestor
+            nodes = self.order_by('-tree_id', '-lft').values_list('pk', 'parent_id', 'article_count')
+            counts = {}
+            for pk, parent_id, article_count in nodes.iterator():
+                counts[pk] = counts.get(pk, 0) + (article_count if pk in visible else 0)
+                if parent_id is not None:
+                    counts[parent_id] = counts.get(parent_id, 0) + counts[pk]
+            return counts
+
+        counts = get_or_compute(VISIBLE_COUNTS_KEY % (generation, get_cache_variant(user)), compute,
+                                getattr(settings, 'ARTICLE_QUERYSET_CACHE_TIMEOUT', 300))
+        if user is not None:
+            user._articles_visible_counts = (generation, counts)
+        return counts
+
+    def move_node(self, node, target, position='last-child'):
+        """
+        ``TreeManager.move_node``, also shifting the subtree's article count
+        from the old to the new ancestors. Used by the tree editor's moves.
+        """
+        parent_id, count = self.filter(pk=node.pk).values_list('parent_id', 'descendant_article_count')[0]
+        self.model._tree_manager.move_node(node, target, position)
+        new_parent_id = self.filter(pk=node.pk).values_list('parent_id', flat=True)[0]
+
+        if new_parent_id != parent_id and count:
+            # Each adjustment reads the ancestors' current tree position
+            if parent_id is not None:
+                self.adjust_descendant_article_count(parent_id, -count)
+            if new_parent_id is not None:
+                self.adjust_descendant_article_count(new_parent_id, count)
+        node._original_parent_id = new_parent_id
+        # The tree manager updates the rows without sending post_save
+        bump_generation(self.model)
+
+    def adjust_article_count(self, category_id, delta):
+        """Add ``delta`` to the counts of a category and its ancestors."""
+        if self.filter(pk=category_id).update(article_count=models.F('article_count') + delta):
+            self.adjust_descendant_article_count(category_id, delta)
+
+    def adjust_descendant_article_count(self, category_id, delta):
+        """Add ``delta`` to the subtree counts of a category and its ancestors."""
+        try:
+            tree_id, lft, rght = self.filter(pk=category_id).values_list('tree_id', 'lft', 'rght')[0]
+        except IndexError:
+            return
+        self.filter(tree_id=tree_id, lft__lte=lft, rght__gte=rght).update(
+            descendant_article_count=models.F('descendant_article_count') + delta)
+        bump_generation(self.model)
 
 
 @python_2_unicode_compatible
@@ -45,8 +169,8 @@ class Category(models.Model):
     access_groups  = models.ManyToManyField("auth.Group", verbose_name=_('access groups'), null=True, blank=True,
                                             help_text=_('Users must be logged in and a member of the group(s) to access this group.'), )
 
+    # Descendants are updated in bulk by update_descendant_urls below
     @denormalized(models.CharField, max_length=255, editable=False, default='', db_index=True)
-    @depend_on_related('self',type='forward')
     def local_url(self):
         if self.parent:
             root = self.parent.local_url
@@ -54,6 +178,26 @@ class Category(models.Model):
             root = ''
         return u'%s%s/' % (root, self.slug)
 
+    article_count = models.PositiveIntegerField(_('articles'), default=0, editable=False)
+    descendant_article_count = models.PositiveIntegerField(
+        _('articles including subcategories'), default=0, editable=False)
+
+    def get_article_count(self, user=None):
+        """
+        Number of active articles listed on this category's page, i.e.
+        including subcategories with ``ARTICLE_SHOW_DESCENDANTS``. Given a
+        user, subcategories they can't access aren't counted.
+        """
+        if not getattr(settings, 'ARTICLE_SHOW_DESCENDANTS', False):
+            return self.article_count
+        if user is None:
+            return self.descendant_article_count
+        return Category.objects.visible_article_counts(user).get(self.pk, 0)
+
+    def move_to(self, target, position='first-child'):
+        """Move through ``CategoryManager.move_node`` to keep the counts right."""
+        Category.objects.move_node(self, target, position)
+
     @property
     def descendant_articles(self):
         return Article.objects.filter(category__in=self.get_descendants(include_self=True))
@@ -69,19 +213,46 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
-    @app_models.permalink
+    @app_permalink
     def get_absolute_url(self):
         return ('article_category', 'articles.urls', (self.local_url,))
 
 mptt.register(Category)
 
 
-ModelAdmin = get_callable(getattr(settings, 'CATEGORY_MODELADMIN_CLASS', 'django.contrib.admin.ModelAdmin'))
+def remember_local_url(sender, instance, **kwargs):
+    instance._original_local_url = instance.__dict__.get('local_url')
+    instance._original_parent_id = instance.__dict__.get('parent_id')
+
+
+def update_descendant_urls(sender, instance, created, raw=False, **kwargs):
+    """After a rename or move, rebuild the urls of the subtree in one pass."""
+    if not created and not raw and instance.local_url != instance._original_local_url:
+        Category.objects.rebuild_local_urls(instance)
+    instance._original_local_url = instance.local_url
+
+
+def move_article_counts(sender, instance, created, raw=False, **kwargs):
+    """
+    After a move by changing the parent of a loaded category (e.g. in the
+    change form), shift the subtree's count from the old to the new
+    ancestors. Moves through ``move_node`` shift it themselves.
+    """
+    if not created and not raw and instance.parent_id != instance._original_parent_id:
+        count = Category.objects.filter(pk=instance.pk).values_list('descendant_article_count', flat=True)[0]
+        for parent_id, delta in ((instance._original_parent_id, -count), (instance.parent_id, count)):
+            if parent_id is not None and delta:
+                Category.objects.adjust_descendant_article_count(parent_id, delta)
+    instance._original_parent_id = instance.parent_id
+
 
+post_init.connect(remember_local_url, sender=Category)
+post_save.connect(update_descendant_urls, sender=Category)
+post_save.connect(move_article_counts, sender=Category)
+post_save.connect(routing.stick_to_primary, sender=Category)
+post_delete.connect(routing.stick_to_primary, sender=Category)
+post_save.connect(bump_generation, sender=Category)
+post_delete.connect(bump_generation, sender=Category)
+m2m_changed.connect(bump_generation_for_m2m, sender=Category.access_groups.through)
 
-class CategoryAdmin(editor.TreeEditor, ModelAdmin):
-    list_display = ['name', 'order_by']
-    list_filter = ['parent',]
-    prepopulated_fields = {
-        'slug': ('name',),
-    }
+deprecated_imports(__name__, {'CategoryAdmin': 'articles.modules.category.modeladmin.CategoryAdmin'})
@@ -0,0 +1,50 @@
+"""
+Previous and next article within a category, following ``Category.order_by``.
+
+Each neighbour is found with one seek query on (order field, pk), which the
+``(category, title)`` and ``(category, publication_date)`` indexes added by the
+category extension answer without reading the rest of the category. Results
+are cached per article until any article or category changes.
+"""
+from django.conf import settings
+from django.db.models import Q
+
+from articles.cache import get_generation, get_or_compute
+
+
+NEIGHBOURS_KEY = 'articles:neighbours:%s:%s'
+
+
+def seek(queryset, field, value, pk, descending):
+    """The first article after (``value``, ``pk``) in (``field``, pk) order."""
+    op = 'lt' if descending else 'gt'
+    prefix = '-' if descending else ''
+    query = Q(**{'%s__%s' % (field, op): value}) | Q(**{field: value, 'pk__%s' % op: pk})
+    return queryset.filter(query).order_by(prefix + field, prefix + 'pk').first()
+
+
+def find_neighbours(article):
+    """(previous, next) active articles of ``article``'s category, or None."""
+    category = article.category
+    ordering = category.order_by
+    field = ordering.lstrip('-')
+    descending = ordering.startswith('-')
+
+    # Neighbours share the category, so they share its access groups too
+    queryset = article.__class__.objects.active().filter(category=category.pk).select_related('category')
+    value = getattr(article, field)
+    return (seek(queryset, field, value, article.pk, not descending),
+            seek(queryset, field, value, article.pk, descending))
+
+
+def get_neighbours(article):
+    """``find_neighbours``, cached until an article or category changes."""
+    timeout = getattr(settings, 'ARTICLE_QUERYSET_CACHE_TIMEOUT', 300)
+    if 'is_live' in [f.name for f in article._meta.fields]:
+        from articles.extensions.publication_state import cache_timeout
+        timeout = cache_timeout(article.__class__, timeout)
+
+    # None isn't cacheable, so store the pair as a list
+    from articles.modules.category.models import Category
+    key = NEIGHBOURS_KEY % (article.pk, get_generation(article.__class__, Category))
+    return tuple(get_or_compute(key, lambda: list(find_neighbours(article)), timeout))
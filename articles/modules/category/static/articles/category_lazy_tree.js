@@ -0,0 +1,55 @@
+// Loads the children of a category when it is first expanded in the tree
+// editor. Runs after feincms/tree_editor.js has set up the listed rows.
+feincms.jQuery(function($) {
+    var rlist = $('#result_list'),
+        rlist_tbody = rlist.find('tbody');
+
+    function markUnloaded(id) {
+        $('#page_marker-' + id).addClass('children closed lazy');
+        feincms.tree_structure[id] = [];
+        // Collapsed for tree_editor.js, so that the first click expands it
+        if (feincms.collapsed_nodes.indexOf(id) == -1)
+            feincms.collapsed_nodes.push(id);
+    }
+
+    if (feincms.collapsed_nodes === undefined) {
+        // tree_editor.js skips a single row, set up what we rely on
+        feincms.collapsed_nodes = [];
+        rlist_tbody.find('tr').each(function() {
+            var marker = $('.page_marker', this);
+            $(this).attr('id', 'item-' + marker.attr('id').split('-')[1]);
+        });
+    }
+
+    $.each(feincms.lazy_nodes || [], function(i, id) { markUnloaded(id); });
+
+    rlist.on('click', 'span.page_marker.lazy', function() {
+        var marker = $(this).removeClass('lazy'),
+            id = parseInt(marker.attr('id').split('-')[1], 10),
+            row = $('#item-' + id);
+
+        // The rows are rendered by the changelist, with their drag handles,
+        // links and action columns
+        $.getJSON(feincms.children_url, {parent: id}, function(children) {
+            var rows = $($.map(children, function(child) {
+                feincms.tree_structure[id].push(child.pk);
+                return child.row;
+            }).join(''));
+            row.after(rows);
+            $.each(children, function(i, child) {
+                if (child.has_children)
+                    markUnloaded(child.pk);
+                else
+                    feincms.tree_structure[child.pk] = [];
+            });
+
+            // Set ids, levels and drag handles up like tree_editor.js does
+            $('div.drag_handle', rlist).unbind('mousedown');
+            rlist_tbody.feinTree();
+            rows.has('.tree-item-not-editable').addClass('non-editable')
+                .find('input:checkbox').attr('disabled', 'disabled');
+            rows.attr('tabindex', -1);
+            rlist_tbody.recolorRows();
+        });
+    });
+});
@@ -51,3 +51,17 @@ def articlecategories(parser, token):
 
     return CategoriesNode(*args, **kwargs)
 
+
+@register.assignment_tag()
+def article_neighbours(article):
+    """
+    The previous and next active articles of the article's category.
+
+    Usage:
+        {% article_neighbours object as neighbours %}
+        {% if neighbours.next %}<a href="{{ neighbours.next.get_absolute_url }}">...</a>{% endif %}
+    """
+    from articles.modules.category.navigation import get_neighbours
+
+    previous, next = get_neighbours(article)
+    return {'previous': previous, 'next': next}
@@ -1,9 +1,10 @@
 from django.conf import settings
-from django.db.models import Q
 from django.http import HttpResponseRedirect
 from django.shortcuts import get_object_or_404
 
 from .models import Category
+from articles import signals
+from articles.modules.archive.views import ArchiveMixin
 from articles.views import ArticleDetail, ArticleList
 
 
@@ -35,6 +36,7 @@ class CategoryArticleDetail(ArticleDetail, CategoryAccesssGroupsMixin):
         if not self.has_access_groups_permission(self.object.category):
             return HttpResponseRedirect("%s?next=%s" % (settings.LOGIN_URL, self.request.path))
 
+        signals.article_viewed.send(sender=self.model, instance=self.object, request=request)
         return self.render_to_response(context)
 
 
@@ -71,11 +73,7 @@ class CategoryArticleList(ArticleList, CategoryAccesssGroupsMixin):
         user = self.request.user
 
         # Limit the articles based on the category access_group permission
-        if user is not None and user.is_authenticated():
-            query = Q(category__access_groups__isnull=True) | Q(category__access_groups__in=user.groups.all())
-        else:
-            query = Q(category__access_groups__isnull=True)
-        articles = articles.filter(query)
+        articles = articles.filter(Category.objects.active_query(user=user, prefix='category__'))
 
         if self.category:
             if getattr(settings, 'ARTICLE_SHOW_DESCENDANTS', False):
@@ -84,3 +82,8 @@ class CategoryArticleList(ArticleList, CategoryAccesssGroupsMixin):
                 articles = articles.filter(category=self.category).order_by(self.category.order_by)
 
         return articles.select_related('category')
+
+
+class CategoryArticleArchive(ArchiveMixin, CategoryArticleList):
+    """Year and month archive of a category, see ``articles.modules.archive``."""
+    template_name = "articles/category_article_archive.html"
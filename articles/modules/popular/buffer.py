@@ -0,0 +1,100 @@
+"""
+Buffers article views in process and writes them to ``ArticleViewCount`` in
+batches, so that page views don't each lock a counter row.
+
+Counts are flushed every ``ARTICLE_VIEWCOUNT_FLUSH_INTERVAL`` seconds or
+after ``ARTICLE_VIEWCOUNT_BUFFER_SIZE`` distinct articles were viewed, once
+the response of the request that made them due has been sent (on
+``request_finished``), and when the process exits. Recording a view never
+writes to the database.
+"""
+import atexit
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ArticleViewCount
+
+
+def today():
+    """The current date in the current time zone, not the server's."""
+    now = timezone.now()
+    if timezone.is_aware(now):
+        now = timezone.localtime(now)
+    return now.date()
+
+
+class ViewCountBuffer(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = defaultdict(int)
+        self.last_flush = time.time()
+
+    def add(self, pk):
+        with self.lock:
+            self.counts[(today(), pk)] += 1
+
+    def is_due(self):
+        with self.lock:
+            return bool(self.counts) and (
+                len(self.counts) >= getattr(settings, 'ARTICLE_VIEWCOUNT_BUFFER_SIZE', 1000) or
+                time.time() - self.last_flush >= getattr(settings, 'ARTICLE_VIEWCOUNT_FLUSH_INTERVAL', 60))
+
+    def flush(self):
+        with self.lock:
+            counts, self.counts = self.counts, defaultdict(int)
+            self.last_flush = time.time()
+
+        by_day = defaultdict(dict)
+        for (day, pk), views in counts.items():
+            by_day[day][pk] = views
+        for day, views in by_day.items():
+            write_counts(day, views)
+
+
+def write_counts(day, views):
+    """
+    Add ``views`` ({article pk: views}) to the counts of ``day``: one INSERT
+    for new rows, one UPDATE per distinct increment for existing ones.
+    """
+    with transaction.atomic():
+        existing = set(ArticleViewCount.objects.filter(date=day, article__in=views.keys())
+                                               .values_list('article_id', flat=True))
+        missing = [pk for pk in views if pk not in existing]
+        if missing:
+            try:
+                with transaction.atomic():
+                    ArticleViewCount.objects.bulk_create([
+                        ArticleViewCount(article_id=pk, date=day, views=views[pk]) for pk in missing])
+            except IntegrityError:
+                # Another process created some of the rows meanwhile
+                for pk in missing:
+                    increment_one(day, pk, views[pk])
+
+        by_increment = defaultdict(list)
+        for pk in existing:
+            by_increment[views[pk]].append(pk)
+        for increment, pks in by_increment.items():
+            ArticleViewCount.objects.filter(date=day, article__in=pks).update(views=F('views') + increment)
+
+
+def increment_one(day, pk, views):
+    counts = ArticleViewCount.objects.filter(date=day, article=pk)
+    if not counts.update(views=F('views') + views):
+        ArticleViewCount.objects.create(article_id=pk, date=day, views=views)
+
+
+def flush_if_due(sender, **kwargs):
+    if view_counts.is_due():
+        view_counts.flush()
+
+
+view_counts = ViewCountBuffer()
+atexit.register(view_counts.flush)
+request_finished.connect(flush_if_due)
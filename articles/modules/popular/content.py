@@ -0,0 +1,41 @@
+from django.db import models
+from django.template.loader import render_to_string
+from django.utils.translation import ugettext_lazy as _
+
+from articles.cache import cached_render
+from articles.querybudget import query_budget
+
+from .models import PERIODS
+from .ranking import most_read
+
+
+class MostReadArticleList(models.Model):
+    """
+    List the most read articles of a period.
+    """
+    number = models.IntegerField()
+    period = models.CharField(_('period'), max_length=10, default='week',
+                              choices=[(p, p) for p in sorted(PERIODS)])
+
+    #: Maximum number of queries a render may run, see ``articles.querybudget``
+    query_budget = None
+
+    class Meta:
+        abstract = True
+        verbose_name = _('most read articles')
+
+    def get_queryset_for_render(self, request=None):
+        return most_read(self.period, user=getattr(request, 'user', None))
+
+    @cached_render
+    def render(self, **kwargs):
+        context = {
+            'object_list': self.get_queryset_for_render(kwargs.get('request'))[:self.number],
+            'request': kwargs.get('request'),
+            'content': self,
+        }
+        with query_budget(self.query_budget, self.__class__.__name__):
+            return render_to_string(['content/articles/%s/most_read.html' % self.region,
+                                     'content/articles/list.html',
+                                    ],
+                                    context)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from articles.modules.popular.models import PERIODS
+from articles.modules.popular.ranking import rank_articles
+
+
+class Command(BaseCommand):
+    args = '[%s ...]' % ' '.join(sorted(PERIODS))
+    help = 'Recompute the most read article rankings (default: all periods).'
+
+    def handle(self, *periods, **options):
+        for period in periods:
+            if period not in PERIODS:
+                raise CommandError('Unknown period "%s"' % period)
+
+        rank_articles(periods)
@@ -0,0 +1,48 @@
+from django.db import models
+from django.utils.translation import ugettext_lazy as _
+
+from articles import signals
+from articles.models import Article
+
+
+PERIODS = {
+    'day': 1,
+    'week': 7,
+    'month': 30,
+}
+
+
+class ArticleViewCount(models.Model):
+    """Number of times an article was viewed on a day."""
+    article = models.ForeignKey(Article, related_name='view_counts')
+    date = models.DateField(_('date'), db_index=True)
+    views = models.PositiveIntegerField(_('views'), default=0)
+
+    class Meta:
+        app_label = 'articles'
+        unique_together = [('article', 'date')]
+        verbose_name = _('article view count')
+        verbose_name_plural = _('article view counts')
+
+
+class MostReadArticle(models.Model):
+    """Precomputed "most read" ranking, see ``articles.modules.popular.ranking``."""
+    period = models.CharField(_('period'), max_length=10, choices=[(p, p) for p in sorted(PERIODS)])
+    rank = models.PositiveIntegerField(_('rank'))
+    article = models.ForeignKey(Article, related_name='most_read')
+    views = models.PositiveIntegerField(_('views'))
+
+    class Meta:
+        app_label = 'articles'
+        ordering = ['period', 'rank']
+        index_together = [('period', 'rank')]
+        verbose_name = _('most read article')
+        verbose_name_plural = _('most read articles')
+
+
+def count_view(sender, instance, **kwargs):
+    from .buffer import view_counts
+    view_counts.add(instance.pk)
+
+
+signals.article_viewed.connect(count_view, sender=Article)
@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+
+from articles.cache import bump_generation
+from articles.models import Article
+from articles.utils import filter_by_category_access
+
+from .buffer import today
+from .models import PERIODS, ArticleViewCount, MostReadArticle
+
+
+def rank_articles(periods=None):
+    """
+    Recompute the "most read" rankings of active articles from the daily
+    view counts.
+    """
+    size = getattr(settings, 'ARTICLE_MOST_READ_COUNT', 50)
+    active = Article.objects.active().order_by().values('pk')
+    for period in periods or PERIODS:
+        since = today() - timedelta(days=PERIODS[period] - 1)
+        totals = (ArticleViewCount.objects.filter(date__gte=since, article__in=active)
+                                          .values('article')
+                                          .annotate(total=Sum('views'))
+                                          .order_by('-total', 'article')[:size])
+        with transaction.atomic():
+            MostReadArticle.objects.filter(period=period).delete()
+            MostReadArticle.objects.bulk_create([
+                MostReadArticle(period=period, rank=rank, article_id=row['article'], views=row['total'])
+                for rank, row in enumerate(totals, 1)])
+    bump_generation(MostReadArticle)
+
+
+def most_read(period='week', user=None):
+    """Active articles of the precomputed ranking, most read first."""
+    articles = Article.objects.active().filter(most_read__period=period)
+    articles = filter_by_category_access(articles, user)
+    return articles.order_by('most_read__rank')
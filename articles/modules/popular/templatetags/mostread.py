@@ -0,0 +1,19 @@
+from django import template
+
+from articles.modules.popular.ranking import most_read
+
+register = template.Library()
+
+
+@register.assignment_tag(takes_context=True)
+def most_read_articles(context, period='week', limit=5):
+    """
+    The most read articles of the last day, week or month.
+
+    Usage:
+        {% most_read_articles as articles %}
+        OR
+        {% most_read_articles 'day' 10 as articles %}
+    """
+    user = 'request' in context and context['request'].user or None
+    return most_read(period, user=user)[:limit]
@@ -0,0 +1,249 @@
+"""
+Scores article similarity from shared tags, category tree distance and
+recency, and stores the best matches in ``RelatedArticle``.
+
+Only the features registered on ``Article`` are used: tags need
+``articles.extensions.tags``, tree distance the category extension and
+recency the datepublisher extension. Candidates share a tag or a category
+group (a category and its siblings, or a root category and its children);
+recency only adds to the score of articles related that way.
+
+Articles changed during a request are refreshed once its response has been
+sent (on ``request_finished``), and when the process exits.
+"""
+import math
+import operator
+import threading
+from collections import defaultdict, namedtuple
+from functools import reduce
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from articles.cache import bump_generation
+from articles.models import Article
+from articles.utils import chunked, parallel_map
+
+from .models import RelatedArticle
+
+
+Features = namedtuple('Features', 'category_id tags date')
+
+DEFAULT_WEIGHTS = {'tags': 1.0, 'category': 0.5, 'recency': 0.2}
+
+# Filled before scoring, inherited by forked worker processes
+_index = {}
+
+# Articles changed by the current thread, waiting for refresh_pending
+_pending = threading.local()
+
+
+def get_weights():
+    return dict(DEFAULT_WEIGHTS, **getattr(settings, 'ARTICLE_RELATED_WEIGHTS', {}))
+
+
+def field_names(model):
+    return set(f.name for f in model._meta.fields + model._meta.many_to_many)
+
+
+def load_features(queryset):
+    """Return {pk: Features} for the articles in ``queryset``."""
+    names = field_names(queryset.model)
+    columns = ['pk',
+               'category_id' if 'category' in names else 'pk',
+               'publication_date' if 'publication_date' in names else 'pk']
+
+    rows = list(queryset.values_list(*columns))
+    tags = defaultdict(set)
+    if 'tags' in names:
+        from django.contrib.contenttypes.models import ContentType
+        from taggit.models import TaggedItem
+        tagged = TaggedItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(queryset.model),
+            object_id__in=[row[0] for row in rows])
+        for object_id, tag_id in tagged.values_list('object_id', 'tag_id').iterator():
+            tags[object_id].add(tag_id)
+
+    return dict((pk, Features(
+        category_id if 'category' in names else None,
+        frozenset(tags[pk]),
+        date if 'publication_date' in names else None)) for pk, category_id, date in rows)
+
+
+def load_categories():
+    """Return {category pk: parent pk}, or {} without categories."""
+    if 'category' not in field_names(Article):
+        return {}
+    from articles.modules.category.models import Category
+    return dict(Category.objects.values_list('pk', 'parent_id').iterator())
+
+
+def category_group(category_id, categories):
+    """The parent of a category, or the category itself for a root."""
+    parent = categories.get(category_id)
+    return category_id if parent is None else parent
+
+
+def build_index(features):
+    _index.clear()
+    _index['features'] = features
+    _index['categories'] = load_categories()
+    _index['weights'] = get_weights()
+    _index['count'] = getattr(settings, 'ARTICLE_RELATED_COUNT', 10)
+    _index['half_life'] = getattr(settings, 'ARTICLE_RELATED_HALF_LIFE', 30)
+    _index['now'] = timezone.now()
+
+    by_tag = defaultdict(list)
+    by_group = defaultdict(list)
+    for pk, feature in features.items():
+        for tag in feature.tags:
+            by_tag[tag].append(pk)
+        if feature.category_id is not None:
+            by_group[category_group(feature.category_id, _index['categories'])].append(pk)
+    _index['by_tag'] = by_tag
+    _index['by_group'] = by_group
+
+
+def tree_distance(a, b):
+    """Number of edges between two categories, None if in different trees."""
+    categories = _index['categories']
+    ancestors = {}
+    node, steps = a, 0
+    while node is not None:
+        ancestors[node] = steps
+        node, steps = categories.get(node), steps + 1
+
+    node, steps = b, 0
+    while node is not None:
+        if node in ancestors:
+            return ancestors[node] + steps
+        node, steps = categories.get(node), steps + 1
+    return None
+
+
+def score(feature, other):
+    weights = _index['weights']
+    total = 0.0
+
+    if feature.tags and other.tags:
+        shared = len(feature.tags & other.tags)
+        total += weights['tags'] * shared / math.sqrt(len(feature.tags) * len(other.tags))
+
+    if feature.category_id is not None and other.category_id is not None:
+        distance = tree_distance(feature.category_id, other.category_id)
+        if distance is not None:
+            total += weights['category'] / (1.0 + distance)
+
+    # Recency alone doesn't relate articles
+    if total and other.date is not None:
+        age = max((_index['now'] - other.date).days, 0)
+        total += weights['recency'] * 0.5 ** (float(age) / _index['half_life'])
+
+    return total
+
+
+def candidates(pk):
+    """Articles sharing a tag or the category group of article ``pk``."""
+    feature = _index['features'][pk]
+    found = set()
+    for tag in feature.tags:
+        found.update(_index['by_tag'][tag])
+    if feature.category_id is not None:
+        found.update(_index['by_group'][category_group(feature.category_id, _index['categories'])])
+    found.discard(pk)
+    return found
+
+
+def compute(pks):
+    """Return (article, related, score) rows for ``pks``. Doesn't touch the database."""
+    rows = []
+    features = _index['features']
+    for pk in pks:
+        scored = [(score(features[pk], features[other]), other) for other in candidates(pk)]
+        scored.sort(reverse=True)
+        rows.extend((pk, other, value) for value, other in scored[:_index['count']] if value > 0)
+    return rows
+
+
+def store(pks, rows):
+    with transaction.atomic():
+        RelatedArticle.objects.filter(article__in=pks).delete()
+        RelatedArticle.objects.bulk_create([
+            RelatedArticle(article_id=pk, related_id=other, score=value) for pk, other, value in rows])
+    bump_generation(RelatedArticle)
+
+
+def rebuild(processes=1, chunk_size=1000):
+    """Recompute related articles for every active article."""
+    build_index(load_features(Article.objects.active()))
+    chunks = chunked(_index['features'].keys(), chunk_size)
+
+    RelatedArticle.objects.exclude(article__in=Article.objects.active()).delete()
+    for pks, rows in zip(chunks, parallel_map(compute, chunks, processes)):
+        store(pks, rows)
+    return len(_index['features'])
+
+
+def neighbour_query(features):
+    """Articles that can score against ``features``, or None if there are none."""
+    queries = []
+    tags = set(tag for feature in features.values() for tag in feature.tags)
+    if tags:
+        queries.append(Q(tags__in=tags))
+    categories = set(feature.category_id for feature in features.values()) - set([None])
+    if categories:
+        from articles.modules.category.models import Category
+        parents = dict(Category.objects.filter(pk__in=categories).values_list('pk', 'parent_id'))
+        groups = set(category_group(pk, parents) for pk in categories)
+        queries.append(Q(category__parent__in=groups) | Q(category__in=groups, category__parent__isnull=True))
+    return reduce(operator.or_, queries) if queries else None
+
+
+def load_neighbours(queryset, features):
+    query = neighbour_query(features)
+    return load_features(queryset.filter(query).distinct()) if query is not None else {}
+
+
+def refresh(pks):
+    """
+    Recompute related articles for the given (changed) articles and for the
+    articles whose matches they may enter or leave: those listing a changed
+    article and those sharing a tag or category with one. Returns the number
+    of articles recomputed.
+    """
+    pks = set(pks)
+    active = Article.objects.active()
+    listing = set(RelatedArticle.objects.filter(related__in=pks).values_list('article', flat=True))
+    changed = load_features(active.filter(pk__in=pks))
+
+    removed = pks - set(changed)
+    RelatedArticle.objects.filter(Q(article__in=removed) | Q(related__in=removed)).delete()
+
+    affected = load_features(active.filter(pk__in=listing - pks))
+    affected.update(load_neighbours(active, changed))
+    affected.update(changed)
+    if not affected:
+        return 0
+
+    # Only load the articles that can score against the affected ones
+    features = load_neighbours(active, affected)
+    features.update(affected)
+    build_index(features)
+    store(list(affected), compute(list(affected)))
+    return len(affected)
+
+
+def defer_refresh(pks):
+    """Refresh ``pks`` with ``refresh_pending``, e.g. after the response."""
+    if getattr(_pending, 'pks', None) is None:
+        _pending.pks = set()
+    _pending.pks.update(pks)
+
+
+def refresh_pending(sender=None, **kwargs):
+    """``request_finished`` receiver refreshing the deferred articles."""
+    pks, _pending.pks = getattr(_pending, 'pks', None), None
+    if pks:
+        refresh(pks)
@@ -0,0 +1,23 @@
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from articles.models import Article
+from articles.modules.related import engine
+
+
+class Command(BaseCommand):
+    args = '[article_slug ...]'
+    help = 'Recompute related articles, for all active articles or only the given ones.'
+    option_list = BaseCommand.option_list + (
+        make_option('--processes', type='int', dest='processes', default=1,
+                    help='Number of worker processes used for a full rebuild.'),
+    )
+
+    def handle(self, *slugs, **options):
+        if slugs:
+            pks = Article.objects.filter(slug__in=slugs).values_list('pk', flat=True)
+            count = engine.refresh(list(pks))
+        else:
+            count = engine.rebuild(processes=options['processes'])
+        self.stdout.write('Computed related articles for %d articles' % count)
@@ -0,0 +1,46 @@
+import atexit
+
+from django.core.signals import request_finished
+from django.db import models
+from django.utils.translation import ugettext_lazy as _
+
+from articles import signals
+from articles.models import Article
+
+
+class RelatedArticle(models.Model):
+    """
+    Precomputed "related articles", see ``articles.modules.related.engine``.
+    """
+    article = models.ForeignKey(Article, related_name='related_articles')
+    related = models.ForeignKey(Article, related_name='related_from')
+    score = models.FloatField(_('score'))
+
+    class Meta:
+        app_label = 'articles'
+        ordering = ['article', '-score']
+        unique_together = [('article', 'related')]
+        index_together = [('article', 'score')]
+        verbose_name = _('related article')
+        verbose_name_plural = _('related articles')
+
+
+def refresh_related_articles(sender, instance, **kwargs):
+    from .engine import defer_refresh
+    defer_refresh([instance.pk])
+
+
+def refresh_bulk_updated_articles(sender, pks, fields, **kwargs):
+    from .engine import defer_refresh
+    defer_refresh(pks)
+
+
+def refresh_pending(sender=None, **kwargs):
+    from .engine import refresh_pending
+    refresh_pending()
+
+
+signals.content_saved.connect(refresh_related_articles, sender=Article)
+signals.articles_bulk_updated.connect(refresh_bulk_updated_articles, sender=Article)
+request_finished.connect(refresh_pending)
+atexit.register(refresh_pending)
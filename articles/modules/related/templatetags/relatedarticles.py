@@ -0,0 +1,22 @@
+from django import template
+
+from articles.models import Article
+from articles.utils import filter_by_category_access
+
+register = template.Library()
+
+
+@register.assignment_tag(takes_context=True)
+def related_articles(context, article, limit=5):
+    """
+    Precomputed related articles, best match first.
+
+    Usage:
+        {% related_articles object as related %}
+        OR
+        {% related_articles object 3 as related %}
+    """
+    articles = Article.objects.active().filter(related_from__article=article)
+    user = 'request' in context and context['request'].user or None
+    articles = filter_by_category_access(articles, user)
+    return articles.order_by('-related_from__score')[:limit]
@@ -0,0 +1,94 @@
+"""
+Full page caching of the article and category views.
+
+Pages are cached per access variant (see ``articles.cache.get_cache_variant``)
+instead of per user: anonymous users share one entry per url, logged in users
+one per combination of the category access groups they belong to. Entries are
+invalidated with the generation counter of ``articles.cache``.
+
+Pages are keyed on the path and the query parameters the view declares
+meaningful (``page`` by default), so that arbitrary parameters (e.g. tracking
+tags) neither split the cache nor fill it with copies.
+
+Enabled by ``ARTICLE_PAGE_CACHE_TIMEOUT``. Responses that aren't a plain 200,
+set cookies, use the CSRF token or are rendered inside FeinCMS application
+content are never cached.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.utils.translation import get_language
+
+from articles.cache import get_cache_variant, get_generation, get_or_compute
+
+
+PAGE_KEY = 'articles:page:%s'
+
+
+def page_cache_key(request, parameters=('page',)):
+    params = sorted((name, request.GET.getlist(name)) for name in parameters if name in request.GET)
+    key = u'%s|%s|%s|%s|%s|%s' % (request.get_host(), request.path, params, get_language(),
+                                  get_generation(), get_cache_variant(getattr(request, 'user', None)))
+    return PAGE_KEY % hashlib.md5(key.encode('utf-8')).hexdigest()
+
+
+def is_app_content(request):
+    return 'app_config' in getattr(request, '_feincms_extra_context', {})
+
+
+def is_cacheable(request, response):
+    return (getattr(response, 'status_code', None) == 200 and
+            not response.cookies and
+            not request.META.get('CSRF_COOKIE_USED') and
+            'private' not in response.get('Cache-Control', ''))
+
+
+def cache_page_variant(view, timeout=None, state=None, hit=None, parameters=('page',)):
+    """
+    Cache ``view`` per access variant for ``timeout`` (default:
+    ``ARTICLE_PAGE_CACHE_TIMEOUT``) seconds. Only the query ``parameters``
+    are part of the key, other ones are ignored. ``state()`` is stored with
+    the response and passed to ``hit(request, state)`` when it is served from
+    the cache, so that views can send their signals.
+    """
+    @wraps(view)
+    def inner(request, *args, **kwargs):
+        page_timeout = timeout or getattr(settings, 'ARTICLE_PAGE_CACHE_TIMEOUT', None)
+        if not page_timeout or request.method not in ('GET', 'HEAD') or is_app_content(request):
+            return view(request, *args, **kwargs)
+
+        computed = []
+
+        def compute():
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+            computed.append(response)
+            return response, state() if state else None
+
+        response, page_state = get_or_compute(
+            page_cache_key(request, parameters), compute, page_timeout,
+            cacheable=lambda value: is_cacheable(request, value[0]))
+        if not computed and hit:
+            hit(request, page_state)
+        return response
+    return inner
+
+
+class PageCacheMixin(object):
+    """Serve a class based view from the page cache."""
+    page_cache_timeout = None
+    #: Query parameters the response depends on
+    page_cache_parameters = ('page',)
+
+    def dispatch(self, request, *args, **kwargs):
+        view = super(PageCacheMixin, self).dispatch
+        return cache_page_variant(view, self.page_cache_timeout, self.get_page_cache_state,
+                                  self.page_cache_hit, self.page_cache_parameters)(request, *args, **kwargs)
+
+    def get_page_cache_state(self):
+        return None
+
+    def page_cache_hit(self, request, state):
+        pass
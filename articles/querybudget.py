@@ -0,0 +1,55 @@
+"""
+Per-component query budgets, enforced in debug and test runs.
+
+Views and content types declare ``query_budget`` (the maximum number of
+queries one render may run); ``None`` means unlimited. Enforcement is on
+when ``ARTICLE_QUERY_BUDGET_ENFORCE`` is set, defaulting to ``DEBUG``.
+"""
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def is_enforced():
+    return getattr(settings, 'ARTICLE_QUERY_BUDGET_ENFORCE', settings.DEBUG)
+
+
+@contextmanager
+def query_budget(budget, label=''):
+    """Raise ``QueryBudgetExceeded`` if the block runs more than ``budget`` queries."""
+    if budget is None or not is_enforced():
+        yield
+        return
+
+    contexts = [CaptureQueriesContext(connection) for connection in connections.all()]
+    for context in contexts:
+        context.__enter__()
+    try:
+        yield
+    finally:
+        for context in contexts:
+            context.__exit__(None, None, None)
+
+    queries = [query['sql'] for context in contexts for query in context.captured_queries]
+    if len(queries) > budget:
+        raise QueryBudgetExceeded('%s ran %d queries, its budget is %d:\n%s' % (
+            label, len(queries), budget, '\n'.join(queries)))
+
+
+class QueryBudgetMixin(object):
+    """Enforce ``query_budget`` on a class based view, including its template."""
+    query_budget = None
+
+    def dispatch(self, request, *args, **kwargs):
+        label = '%s.%s' % (self.__class__.__module__, self.__class__.__name__)
+        with query_budget(self.query_budget, label):
+            response = super(QueryBudgetMixin, self).dispatch(request, *args, **kwargs)
+            if self.query_budget is not None and is_enforced() and hasattr(response, 'render'):
+                response.render()
+        return response
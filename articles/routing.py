@@ -0,0 +1,114 @@
+"""
+Route anonymous article reads to a read replica.
+
+Only the read paths built on ``ArticleManager.active()`` and
+``CategoryManager.active()`` are routed, and only while a request handled by
+``ArticleReadRoutingMiddleware`` is anonymous and not a preview. A client
+that saved or deleted an article or category gets a cookie pinning its reads
+to the default database for ``ARTICLE_READ_STICKY_SECONDS``, so it sees its
+own changes; other clients keep reading from the replica.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+
+STICKY_COOKIE = 'articles_sticky'
+
+_state = threading.local()
+
+
+def get_read_database():
+    return getattr(settings, 'ARTICLE_READ_DATABASE', None)
+
+
+def get_sticky_seconds():
+    return getattr(settings, 'ARTICLE_READ_STICKY_SECONDS', 10)
+
+
+def is_sticky(request):
+    """Whether ``request`` wrote, or comes from a client that wrote recently."""
+    return getattr(request, '_articles_sticky', False) or STICKY_COOKIE in request.COOKIES
+
+
+def is_replica_request(request):
+    """
+    Anonymous, non-preview requests of clients that didn't write recently
+    may be served from the replica.
+    """
+    if request is None:
+        return False
+
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated():
+        return False
+
+    return (getattr(settings, 'ARTICLE_PREVIEW_PARAMETER', '_preview') not in request.GET and
+            not is_sticky(request))
+
+
+def db_for_read(force=False):
+    """
+    Return the database alias reads should use, or None for the default.
+    ``force`` routes reads made outside of a request (e.g. search indexing).
+    """
+    alias = get_read_database()
+    if alias is None:
+        return None
+
+    request = getattr(_state, 'request', None)
+    if force:
+        if request is not None and is_sticky(request):
+            return None
+        # Writes made outside of a request stick to their thread
+        return None if getattr(_state, 'sticky_until', 0) > time.time() else alias
+
+    return alias if is_replica_request(request) else None
+
+
+def route_read(queryset, force=False):
+    """Apply ``db_for_read`` to a queryset unless it was explicitly routed."""
+    if queryset._db is not None:
+        return queryset
+
+    alias = db_for_read(force=force)
+    if alias is None:
+        return queryset
+
+    return queryset.using(alias)
+
+
+def stick_to_primary(sender, **kwargs):
+    """
+    Signal receiver pinning the reads of the writing client to the default
+    database; ``ArticleReadRoutingMiddleware`` sets the cookie.
+    """
+    timeout = get_sticky_seconds()
+    if get_read_database() is None or not timeout:
+        return
+
+    request = getattr(_state, 'request', None)
+    if request is not None:
+        request._articles_sticky = True
+    else:
+        _state.sticky_until = time.time() + timeout
+
+
+class ArticleReadRoutingMiddleware(object):
+    """
+    Make the current request available to ``db_for_read`` and send the sticky
+    cookie to clients that wrote.
+    """
+
+    def process_request(self, request):
+        _state.request = request
+
+    def process_response(self, request, response):
+        _state.request = None
+        if getattr(request, '_articles_sticky', False):
+            response.set_cookie(STICKY_COOKIE, '1', max_age=get_sticky_seconds(), httponly=True)
+        return response
+
+    def process_exception(self, request, exception):
+        _state.request = None
@@ -1,6 +1,9 @@
+from django.db import router
 from django.db.models.fields import FieldDoesNotExist
 from haystack import indexes
 
+from articles import routing, signals
+from articles.utils import chunked
 from models import Article
 
 
@@ -13,7 +16,7 @@ class TempArticleIndex(indexes.SearchIndex):
         return Article
 
     def index_queryset(self):
-        return self.get_model().objects.active()
+        return routing.route_read(self.get_model().objects.active(), force=True)
 
     def get_updated_field(self, **kwargs):
         try:
@@ -24,6 +27,25 @@ class TempArticleIndex(indexes.SearchIndex):
             return 'modification_date'
 
 
+def update_bulk_updated_articles(sender, pks, fields, **kwargs):
+    """Reindex articles changed by ``articles.bulk``, which sends no ``post_save``."""
+    if 'active' not in fields and 'category' not in fields:
+        return
+    from haystack import connections
+
+    # The replica may not have the rows updated by the batch yet
+    database = router.db_for_write(sender)
+    for using in connections.connections_info:
+        index = connections[using].get_unified_index().get_index(sender)
+        backend = connections[using].get_backend()
+        for chunk in chunked(pks, 500):
+            live = index.index_queryset().using(database).filter(pk__in=chunk)
+            backend.update(index, live)
+            live_pks = set(record.pk for record in sender.objects.records(live, fields=('pk',)))
+            for pk in set(chunk) - live_pks:
+                backend.remove('%s.%s.%s' % (sender._meta.app_label, sender._meta.model_name, pk))
+
+
 try:
     # In haystack < 2.0 we need to explicitly register indexes
     from haystack import site
@@ -31,6 +53,8 @@ except ImportError:
     # In haystack >= 2.0 Indexes subclass indexes.Indexable
     class ArticleIndex(TempArticleIndex, indexes.Indexable):
         pass
+
+    signals.articles_bulk_updated.connect(update_bulk_updated_articles, sender=Article)
 else:
     class ArticleIndex(TempArticleIndex):
         def get_queryset(self):
@@ -0,0 +1,18 @@
+from django.dispatch import Signal
+
+
+#: Sent by ``ArticleAdmin`` once an article and all of its content blocks
+#: have been saved.
+content_saved = Signal(providing_args=['instance'])
+
+#: Sent by the article detail views when an article has been displayed. For
+#: pages served from ``articles.pagecache`` only ``instance.pk`` is set.
+article_viewed = Signal(providing_args=['instance', 'request'])
+
+#: Sent by ``articles.extensions.publication_state`` after articles went live
+#: or offline because their publication window opened or closed.
+publication_changed = Signal(providing_args=['went_live', 'went_offline'])
+
+#: Sent by the functions of ``articles.bulk`` once per batch of articles
+#: changed with set based updates, which don't send ``post_save``.
+articles_bulk_updated = Signal(providing_args=['pks', 'fields'])
@@ -75,3 +75,39 @@ def articles(parser, token):
 
     return ArticlesNode(*args, **kwargs)
 
+
+
+@register.assignment_tag(takes_context=True)
+def search_articles(context, query, limit=None):
+    """
+    Search articles with ``articles.extensions.search``.
+
+    Usage:
+        {% search_articles query as results %}
+        OR
+        {% search_articles query 10 as results %}
+    """
+    from ..extensions.search import search_articles
+
+    user = 'request' in context and context['request'].user or None
+    results = search_articles(query, user=user)
+    if limit is not None:
+        results = results[:limit]
+    return results
+
+
+@register.simple_tag(takes_context=True)
+def article_region(context, article, region, request=None):
+    """
+    Render a region of an article, using the HTML stored by
+    ``articles.extensions.rendered_regions`` when available.
+
+    Usage:
+        {% article_region article 'summary' request %}
+    """
+    rendered = getattr(article, 'get_rendered_region', lambda region: None)(region)
+    if rendered is not None:
+        return rendered
+
+    from feincms.templatetags.feincms_tags import feincms_render_region
+    return feincms_render_region(context, article, region, request)
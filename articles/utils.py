@@ -1,4 +1,14 @@
+import multiprocessing
+import sys
+import types
+import warnings
+from functools import wraps
+
 from django import template
+from django.core.urlresolvers import get_callable
+from django.db import connections, router, transaction
+from django.utils.encoding import force_text
+from django.utils.html import strip_tags
 
 
 def parse_tokens(parser, bits):
@@ -19,3 +29,109 @@ def parse_tokens(parser, bits):
             raise template.TemplateSyntaxError('Bad argument "%s" for tag "%s"' % (bit, bits[0]))
 
     return args, kwargs
+
+
+def bulk_update_column(model, column, rows, chunk_size=500):
+    """
+    Set ``column`` for many rows of ``model`` with batched UPDATEs.
+    ``rows`` is an iterable of (value, pk) pairs. No signals are sent.
+    """
+    using = router.db_for_write(model)
+    connection = connections[using]
+    sql = 'UPDATE %s SET %s = %%s WHERE %s = %%s' % (
+        connection.ops.quote_name(model._meta.db_table),
+        connection.ops.quote_name(column),
+        connection.ops.quote_name(model._meta.pk.column),
+    )
+
+    rows = list(rows)
+    with transaction.atomic(using=using):
+        cursor = connection.cursor()
+        for i in range(0, len(rows), chunk_size):
+            cursor.executemany(sql, rows[i:i + chunk_size])
+
+    return len(rows)
+
+
+def content_text(content):
+    """Plain text of a rendered FeinCMS content block."""
+    return strip_tags(force_text(content.render(request=None))).strip()
+
+
+def parallel_map(func, chunks, processes=1):
+    """
+    ``map(func, chunks)`` over a pool of worker processes. Database
+    connections are closed before forking, so each worker opens its own.
+    """
+    if processes <= 1:
+        return [func(chunk) for chunk in chunks]
+
+    for connection in connections.all():
+        connection.close()
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        return pool.map(func, chunks)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def chunked(items, size):
+    items = list(items)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def filter_by_category_access(queryset, user):
+    """
+    Limit ``queryset`` to the categories ``user`` may access (see
+    ``CategoryManager.active_query``). Works for articles and for models with a
+    plain ``category_id`` column such as ``ArchiveMonth``; returns the queryset
+    unchanged when the category extension is not registered.
+    """
+    from articles.models import Article
+
+    if 'category' not in [f.name for f in Article._meta.fields]:
+        return queryset
+
+    from articles.modules.category.models import Category
+    if 'category' in [f.name for f in queryset.model._meta.fields]:
+        return queryset.filter(Category.objects.active_query(user=user, prefix='category__')).distinct()
+    return queryset.filter(category_id__in=Category.objects.filter(
+        Category.objects.active_query(user=user)).values('pk'))
+
+
+def app_permalink(func):
+    """
+    Same as FeinCMS' ``app_models.permalink``, but imports the application
+    content module (and with it the item editor admin) only when called.
+    """
+    @wraps(func)
+    def inner(*args, **kwargs):
+        from feincms.content.application.models import app_reverse
+        return app_reverse(*func(*args, **kwargs))
+    return inner
+
+
+def deprecated_imports(module_name, moved):
+    """
+    Keep names that moved out of module ``module_name`` importable from it.
+    ``moved`` maps each name to its new dotted path; the target is imported
+    on first access, with a ``DeprecationWarning``.
+    """
+    module = sys.modules[module_name]
+
+    class DeprecatedImportsModule(types.ModuleType):
+        # Python 2 clears the globals of a collected module, keep it alive
+        original = module
+
+        def __getattr__(self, name):
+            if name not in moved:
+                raise AttributeError("'module' object has no attribute '%s'" % name)
+            warnings.warn('Import %s from %s instead of %s.' % (name, moved[name].rsplit('.', 1)[0], module_name),
+                          DeprecationWarning, stacklevel=2)
+            return get_callable(moved[name])
+
+    replacement = DeprecatedImportsModule(module_name, module.__doc__)
+    replacement.__dict__.update(module.__dict__)
+    sys.modules[module_name] = replacement
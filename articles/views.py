@@ -1,6 +1,13 @@
-from django.views.generic import DetailView, ListView
+import json
 
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.views.generic import DetailView, ListView, View
+
+from . import signals
 from .models import Article
+from .pagecache import PageCacheMixin
+from .querybudget import QueryBudgetMixin
 
 
 class AppContentMixin(object):
@@ -14,15 +21,65 @@ class AppContentMixin(object):
         return super(AppContentMixin, self).render_to_response(context, **response_kwargs)
 
 
-class ArticleDetail(AppContentMixin, DetailView):
+class ArticleDetail(PageCacheMixin, QueryBudgetMixin, AppContentMixin, DetailView):
     model = Article
 
     def get_queryset(self):
         return Article.objects.active()
 
+    def get(self, request, *args, **kwargs):
+        response = super(ArticleDetail, self).get(request, *args, **kwargs)
+        signals.article_viewed.send(sender=self.model, instance=self.object, request=request)
+        return response
+
+    def get_page_cache_state(self):
+        return self.object.pk if getattr(self, 'object', None) else None
+
+    def page_cache_hit(self, request, state):
+        if state is not None:
+            signals.article_viewed.send(sender=self.model, instance=self.model(pk=state), request=request)
+
 
-class ArticleList(AppContentMixin, ListView):
+class ArticleList(PageCacheMixin, QueryBudgetMixin, AppContentMixin, ListView):
     model = Article
 
     def get_queryset(self):
         return Article.objects.active()
+
+
+class ArticleSearch(ArticleList):
+    """Search articles using ``articles.extensions.search``."""
+    template_name = 'articles/article_search.html'
+    page_cache_parameters = ('q', 'page')
+
+    def get_queryset(self):
+        from .extensions.search import search_articles
+        return search_articles(self.request.GET.get('q', ''), user=self.request.user)
+
+    def get_context_data(self, **kwargs):
+        context = super(ArticleSearch, self).get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
+class ArticleMapClusters(View):
+    """
+    JSON clusters of the articles within ``bbox`` (min lng, min lat, max lng,
+    max lat) at ``zoom``, see ``articles.extensions.location``.
+    """
+
+    def get(self, request, *args, **kwargs):
+        from .extensions.location import map_clusters, tile_count
+
+        try:
+            bbox = [float(value) for value in request.GET['bbox'].split(',')]
+            zoom = int(request.GET['zoom'])
+        except (KeyError, ValueError):
+            return HttpResponseBadRequest('bbox and zoom are required')
+        if len(bbox) != 4 or not 0 <= zoom <= getattr(settings, 'ARTICLE_MAP_MAX_ZOOM', 20):
+            return HttpResponseBadRequest('Invalid bbox or zoom')
+        if tile_count(bbox, zoom) > getattr(settings, 'ARTICLE_MAP_MAX_TILES', 64):
+            return HttpResponseBadRequest('bbox too large for this zoom')
+
+        clusters = map_clusters(bbox, zoom, user=request.user)
+        return HttpResponse(json.dumps({'zoom': zoom, 'clusters': clusters}), content_type='application/json')
@@ -0,0 +1,57 @@
+"""
+Time a cold import of the article models and list any admin, GIS admin,
+search or view module it pulled in.
+
+Usage:
+    DJANGO_SETTINGS_MODULE=myproject.settings python benchmarks/import_time.py [runs]
+"""
+import json
+import subprocess
+import sys
+
+
+# Modules the model layer must not import
+HEAVY_MODULES = [
+    'articles.modeladmin',
+    'articles.changelist',
+    'articles.views',
+    'articles.modules.category.modeladmin',
+    'articles.modules.category.views',
+    'django.contrib.gis.admin',
+    'feincms.admin.tree_editor',
+    'haystack',
+]
+
+CODE = """
+import json, sys, time
+start = time.time()
+import articles.models
+try:
+    import articles.modules.category.models
+except ImportError:
+    pass
+elapsed = time.time() - start
+print(json.dumps({'seconds': elapsed, 'modules': [m for m in %r if m in sys.modules]}))
+""" % HEAVY_MODULES
+
+
+def measure():
+    output = subprocess.check_output([sys.executable, '-c', CODE])
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+
+def main(runs=5):
+    results = [measure() for i in range(runs)]
+    timings = sorted(result['seconds'] for result in results)
+    print('import articles.models: median %.1f ms, min %.1f ms over %d runs' % (
+        timings[len(timings) // 2] * 1000, timings[0] * 1000, runs))
+
+    loaded = results[0]['modules']
+    if loaded:
+        print('Heavy modules imported: %s' % ', '.join(loaded))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*[int(arg) for arg in sys.argv[1:]]))
@@ -6,6 +6,7 @@ setup(
     packages=find_packages(),
     include_package_data=True,
     install_requires=[
+        'Django>=1.6',
         'FeinCMS>=1.7',
         'django-mptt',
         'django-pagination',